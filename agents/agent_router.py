@@ -1,14 +1,31 @@
+import asyncio
 import re
 import logging
+from typing import Awaitable, Callable
 
 from config import Config
 from llm.ollama_client import OllamaClient
+from llm.resilience import LLMUnavailableError, run_with_deadline
+from llm.scheduler import Priority, current_priority, run_with_priority
 from skills.skill_registry import SkillRegistry
-from chat.engine import _strip_think
+from chat.think_filter import strip_think
+from chat.context_assembler import context_budget, fit_messages
+from chat.prompt_layout import PrefixTracker
 from agents.template_loader import AgentTemplate, TemplateLoader
 
 logger = logging.getLogger(__name__)
 
+# Receives tool events of a running agent as they happen
+EventCallback = Callable[[dict], Awaitable[None]]
+
+_WORD_RE = re.compile(r"[a-zA-Zäöüß]{4,}")
+# Words are compared by prefix so German inflections still match ("schreib" ~ "schreiben")
+_STEM_LEN = 5
+
+
+def _stems(text: str) -> set[str]:
+    return {w[:_STEM_LEN] for w in _WORD_RE.findall(text.lower())}
+
 
 class AgentRouter:
     def __init__(self, ollama: OllamaClient, skills: SkillRegistry):
@@ -16,6 +33,8 @@ class AgentRouter:
         self.skills = skills
         self.loader = TemplateLoader(Config.AGENT_TEMPLATES_DIR)
         self.agents: dict[str, AgentTemplate] = self.loader.load_all()
+        self._last_agent: str | None = None
+        self.prefix_stats = PrefixTracker()
 
     def reload(self) -> int:
         """Reload all agent templates from disk. Returns the agent count."""
@@ -74,6 +93,45 @@ class AgentRouter:
             },
         }
 
+    def predict_agent(
+        self, text: str, candidates: list[str] | None = None, min_score: float = 1
+    ) -> str | None:
+        """Guess which agent a message is likely to be delegated to (None if no clear winner).
+
+        Scores word overlap between the message and each agent's name,
+        description and skills; the most recently used agent wins ties.
+        The best agent must reach min_score and lead the runner-up by at
+        least one matching word.
+        """
+        words = _stems(text)
+        if not words:
+            return None
+        best, best_score, runner_up = None, 0.0, 0.0
+        for name, tpl in self.agents.items():
+            if name == "general" or (candidates is not None and name not in candidates):
+                continue
+            vocab = _stems(" ".join([name, tpl.description, *(tpl.skills or [])]).replace("_", " "))
+            score = len(words & vocab) + (0.5 if name == self._last_agent else 0.0)
+            if score > best_score:
+                best, best_score, runner_up = name, score, best_score
+            elif score > runner_up:
+                runner_up = score
+        if best_score < max(min_score, 1) or best_score - runner_up < 1:
+            return None
+        return best
+
+    def warm_predicted(self, text: str, candidates: list[str] | None = None, min_score: float = 2):
+        """Start loading the model of the agent this message will probably need.
+
+        Loading a model can evict the main one on a small GPU, so this only
+        happens for confident predictions (see predict_agent).
+        """
+        agent_name = self.predict_agent(text, candidates, min_score)
+        if agent_name:
+            model = self.agents[agent_name].model
+            if self.ollama.models.warm(model):
+                logger.info(f"Warming model '{model}' for likely delegation to '{agent_name}'")
+
     def get_tools_for_agent(self, agent_name: str) -> list[dict]:
         tpl = self.agents.get(agent_name)
         if not tpl:
@@ -105,20 +163,46 @@ class AgentRouter:
         agent_name: str,
         task: str,
         conversation_context: list[dict] | None = None,
+        on_event: EventCallback | None = None,
     ) -> tuple[str, list[dict]]:
         """Run a specialist agent.
 
         Returns (text_response, tool_events) where tool_events is a list of
         dicts to forward to the frontend (tool_call notifications, images).
+        With on_event, each event is also passed to it as soon as it happens.
+        LLM calls run at agent priority, or lower if the caller already is,
+        and within AGENT_DEADLINE (or the caller's deadline, if sooner).
         """
+        priority = max(current_priority.get(), Priority.AGENT)
+        try:
+            return await run_with_priority(priority, run_with_deadline(
+                Config.AGENT_DEADLINE, self._run_agent(agent_name, task, conversation_context, on_event)
+            ))
+        except LLMUnavailableError as e:
+            logger.warning(f"Agent '{agent_name}' aborted: {e}")
+            return f"Fehler: Agent '{agent_name}' hat nicht rechtzeitig geantwortet ({e}).", []
+
+    async def _run_agent(
+        self,
+        agent_name: str,
+        task: str,
+        conversation_context: list[dict] | None,
+        on_event: EventCallback | None,
+    ) -> tuple[str, list[dict]]:
         tpl = self.agents.get(agent_name)
         if not tpl:
             return f"Fehler: Agent '{agent_name}' nicht gefunden.", []
 
         model = tpl.model
         system_prompt = tpl.system_prompt or ""
+        self._last_agent = agent_name
         events: list[dict] = []
 
+        async def emit(event: dict):
+            events.append(event)
+            if on_event:
+                await on_event(event)
+
         logger.info(f"Running agent '{agent_name}' with model '{model}'")
 
         messages = []
@@ -131,6 +215,7 @@ class AgentRouter:
                 if msg["role"] in ("user", "assistant"):
                     messages.append(msg)
 
+        turn_start = len(messages)
         messages.append({"role": "user", "content": task})
 
         tools = self.get_tools_for_agent(agent_name)
@@ -140,44 +225,30 @@ class AgentRouter:
         if tpl.temperature is not None:
             options["temperature"] = tpl.temperature
 
+        budget = tpl.context_tokens or context_budget(model)
+
         max_rounds = tpl.max_rounds
         response = {}
         for _ in range(max_rounds):
+            fitted = fit_messages(messages, budget, tools)
+            self.prefix_stats.observe(model, fitted, tools)
             response = await self.ollama.chat(
-                messages, tools=tools or None, model=model,
-                options=options or None,
+                fitted, tools=tools or None, model=model, options=options or None,
             )
 
             if response.get("tool_calls"):
-                for tool_call in response["tool_calls"]:
-                    fn = tool_call.get("function", {})
-                    tool_name = fn.get("name", "")
-                    tool_args = fn.get("arguments", {})
-
-                    skill = self.skills.get(tool_name)
-                    if skill:
-                        valid_params = set(skill.parameters.get("properties", {}).keys())
-                        tool_args = {k: v for k, v in tool_args.items() if k in valid_params}
-
-                    events.append({
-                        "type": "tool_call",
-                        "tool": f"{agent_name}:{tool_name}",
-                        "args": tool_args,
-                    })
-
-                    result = await self.skills.execute(tool_name, **tool_args)
-
-                    # Extract images from tool result
-                    img_matches = re.findall(
-                        r'!\[([^\]]*)\]\((\/generated\/[^)]+)\)', result or ""
-                    )
-                    for alt, src in img_matches:
-                        events.append({"type": "image", "src": src, "alt": alt})
-
-                    # Strip image markdown so the agent LLM doesn't repeat it
-                    if img_matches:
-                        result = re.sub(r'!\[([^\]]*)\]\(\/generated\/[^)]+\)', '[Bild wurde angezeigt]', result)
-
+                # All calls of a round run concurrently (bounded by the skill registry)
+                tool_calls = response["tool_calls"]
+                results = await asyncio.gather(*(
+                    self._execute_tool(agent_name, tc, emit) for tc in tool_calls
+                ), return_exceptions=True)
+                for tool_call, res in zip(tool_calls, results):
+                    if isinstance(res, Exception):
+                        logger.exception(f"Agent '{agent_name}' tool call failed", exc_info=res)
+                        tool_name = tool_call.get("function", {}).get("name", "")
+                        result = f"Fehler: {res}"
+                    else:
+                        tool_name, result = res
                     messages.append({
                         "role": "assistant",
                         "content": "",
@@ -191,14 +262,51 @@ class AgentRouter:
             else:
                 break
 
-        text = _strip_think(response.get("content", ""))
+        text = strip_think(response.get("content", ""))
         if not text:
             messages.append({
                 "role": "user",
                 "content": "Fasse die Ergebnisse zusammen und beantworte die Aufgabe.",
             })
-            response = await self.ollama.chat(messages, tools=None, model=model)
-            text = _strip_think(response.get("content", ""))
+            response = await self.ollama.chat(
+                fit_messages(messages, budget, turn_start=turn_start), tools=None, model=model,
+                options=options or None,
+            )
+            text = strip_think(response.get("content", ""))
 
         logger.info(f"Agent '{agent_name}' finished. Response length: {len(text)}")
         return text or "Der Agent konnte keine Antwort generieren.", events
+
+    async def _execute_tool(
+        self, agent_name: str, tool_call: dict, emit: EventCallback
+    ) -> tuple[str, str]:
+        """Execute one tool call of an agent, emitting its events. Returns (tool_name, result)."""
+        fn = tool_call.get("function", {})
+        tool_name = fn.get("name", "")
+        tool_args = fn.get("arguments", {})
+
+        skill = self.skills.get(tool_name)
+        if skill:
+            valid_params = set(skill.parameters.get("properties", {}).keys())
+            tool_args = {k: v for k, v in tool_args.items() if k in valid_params}
+
+        await emit({
+            "type": "tool_call",
+            "tool": f"{agent_name}:{tool_name}",
+            "args": tool_args,
+        })
+
+        result = await self.skills.execute(tool_name, **tool_args)
+
+        # Extract images from tool result
+        img_matches = re.findall(
+            r'!\[([^\]]*)\]\((\/generated\/[^)]+)\)', result or ""
+        )
+        for alt, src in img_matches:
+            await emit({"type": "image", "src": src, "alt": alt})
+
+        # Strip image markdown so the agent LLM doesn't repeat it
+        if img_matches:
+            result = re.sub(r'!\[([^\]]*)\]\(\/generated\/[^)]+\)', '[Bild wurde angezeigt]', result)
+
+        return tool_name, result
@@ -18,6 +18,7 @@ class AgentTemplate:
     max_rounds: int = 5
     temperature: float | None = None
     context_window: int = 4
+    context_tokens: int | None = None  # None = per-model budget from Config
     builtin: bool = field(default=False, repr=False)
 
     def to_dict(self) -> dict:
@@ -20,6 +20,9 @@ class ChannelAdapter(ABC):
     async def send_stream_end(self) -> None:
         ...
 
+    async def send_thinking_token(self, token: str) -> None:
+        """Reasoning (<think>) text streamed separately; ignored by default."""
+
     @abstractmethod
     async def send_message(self, content: str) -> None:
         ...
@@ -51,6 +54,9 @@ class WebSocketAdapter(ChannelAdapter):
     async def send_stream_end(self) -> None:
         await self.ws.send_json({"type": "stream_end"})
 
+    async def send_thinking_token(self, token: str) -> None:
+        await self.ws.send_json({"type": "thinking", "token": token})
+
     async def send_message(self, content: str) -> None:
         await self.ws.send_json({"type": "message", "content": content})
 
@@ -0,0 +1,132 @@
+import json
+import logging
+import math
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Rough local estimate: ~3.5 characters per token for German prose and code
+CHARS_PER_TOKEN = 3.5
+MESSAGE_OVERHEAD_TOKENS = 4
+IMAGE_TOKENS = 768
+# Smallest size a message is truncated to before anything else is cut
+MIN_MESSAGE_TOKENS = 128
+_TRUNCATION_MARKER = "\n\n[... gekuerzt ...]\n\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast token estimate from the character count."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def message_tokens(message: dict) -> int:
+    tokens = MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.get("content") or "")
+    tokens += IMAGE_TOKENS * len(message.get("images") or [])
+    if message.get("tool_calls"):
+        tokens += estimate_tokens(json.dumps(message["tool_calls"], ensure_ascii=False))
+    return tokens
+
+
+def tools_tokens(tools: list[dict] | None) -> int:
+    if not tools:
+        return 0
+    return estimate_tokens(json.dumps(tools, ensure_ascii=False))
+
+
+def context_budget(model: str | None = None) -> int:
+    """Prompt token budget for a model (per-model override or the global default)."""
+    model = model or Config.OLLAMA_MODEL
+    budget = Config.MODEL_CONTEXT_BUDGETS.get(model, Config.CONTEXT_TOKEN_BUDGET)
+    return max(budget - Config.CONTEXT_RESPONSE_RESERVE, MIN_MESSAGE_TOKENS * 4)
+
+
+def _truncate(message: dict, max_tokens: int) -> dict:
+    """Return a copy of message whose content fits max_tokens (keeps head and tail)."""
+    content = message.get("content") or ""
+    max_chars = max(int((max_tokens - MESSAGE_OVERHEAD_TOKENS) * CHARS_PER_TOKEN), 0)
+    if len(content) <= max_chars:
+        return message
+    keep = max(max_chars - len(_TRUNCATION_MARKER), 0)
+    head = keep * 2 // 3
+    tail = keep - head
+    truncated = dict(message)
+    truncated["content"] = content[:head] + _TRUNCATION_MARKER + (content[-tail:] if tail else "")
+    return truncated
+
+
+def fit_messages(
+    messages: list[dict],
+    budget: int,
+    tools: list[dict] | None = None,
+    turn_start: int | None = None,
+) -> list[dict]:
+    """Fit a chat message list into a token budget.
+
+    The system message and the current turn (last user message plus any
+    tool rounds after it) are kept; older history absorbs the cuts first.
+    turn_start is the index where the current turn begins; callers that
+    append their own instruction after the tool rounds pass it, so those
+    rounds stay part of the turn.
+    Order of measures: shrink oversized history messages, drop the oldest
+    history, truncate the largest current-turn content (tool results,
+    pasted logs), and finally the system message. Returns a new list;
+    the input is not modified.
+    """
+    result = list(messages)
+    counts = [message_tokens(m) for m in result]
+    available = budget - tools_tokens(tools)
+    if sum(counts) <= available:
+        return result
+
+    first = 1 if result and result[0].get("role") == "system" else 0
+    if turn_start is not None:
+        current = min(max(turn_start, first), len(result))
+    else:
+        current = next(
+            (i for i in range(len(result) - 1, first - 1, -1) if result[i].get("role") == "user"),
+            len(result),
+        )
+
+    # 1. Shrink oversized history messages, oldest first
+    history_cap = max(available // 8, MIN_MESSAGE_TOKENS)
+    for i in range(first, current):
+        if counts[i] > history_cap:
+            result[i] = _truncate(result[i], history_cap)
+            counts[i] = message_tokens(result[i])
+
+    # 2. Drop oldest history messages
+    while current > first and sum(counts) > available:
+        del result[first]
+        del counts[first]
+        current -= 1
+
+    # 3. Truncate the largest messages of the current turn
+    exhausted: set[int] = set()
+    while sum(counts) > available:
+        candidates = [
+            i for i in range(current, len(result))
+            if counts[i] > MIN_MESSAGE_TOKENS and i not in exhausted
+        ]
+        if not candidates:
+            break
+        i = max(candidates, key=lambda j: counts[j])
+        excess = sum(counts) - available
+        before = counts[i]
+        result[i] = _truncate(result[i], max(before - excess, MIN_MESSAGE_TOKENS))
+        counts[i] = message_tokens(result[i])
+        if counts[i] >= before:
+            exhausted.add(i)
+
+    # 4. Last resort: truncate the system message (memory block sits at its end)
+    if first and sum(counts) > available:
+        excess = sum(counts) - available
+        result[0] = _truncate(result[0], max(counts[0] - excess, MIN_MESSAGE_TOKENS))
+        counts[0] = message_tokens(result[0])
+
+    logger.debug(
+        f"Context fitted: {len(messages)} -> {len(result)} messages, ~{sum(counts)} tokens (budget {available})"
+    )
+    return result
@@ -1,53 +1,38 @@
 import asyncio
 import re
 import logging
+from functools import partial
 
 from chat.adapters import ChannelAdapter
+from chat.context_assembler import context_budget, fit_messages
+from chat.prompt_layout import PrefixTracker
+from chat.think_filter import ThinkFilter, strip_think
 from config import Config
-from memory.context_builder import build_memory_context
+from llm.resilience import LLMUnavailableError, current_deadline, run_with_deadline
+from llm.scheduler import Priority, run_with_priority
+from memory.context_builder import build_core_memory_context, build_relevant_memory_context
 from memory.fact_extractor import extract_facts
 from services.tts_service import generate_tts
 
 logger = logging.getLogger(__name__)
 
-_THINK_RE = re.compile(r"<think>[\s\S]*?</think>\s*", re.IGNORECASE)
-_TOOL_CALL_RE = re.compile(r"<tool_call>[\s\S]*?</tool_call>\s*", re.IGNORECASE)
-
-
-def _strip_think(text: str) -> str:
-    """Remove <think>...</think>, <tool_call>...</tool_call> blocks and model filler from output."""
-    text = _THINK_RE.sub("", text)
-    text = _TOOL_CALL_RE.sub("", text)
-    # Handle unclosed <think> (no </think>): drop everything from <think> onward
-    if "<think>" in text.lower():
-        idx = text.lower().rfind("<think>")
-        text = text[:idx]
-    # Handle </think> without opening <think>: drop everything up to and including </think>
-    if "</think>" in text.lower():
-        idx = text.lower().rfind("</think>")
-        text = text[idx + len("</think>"):]
-    lines = text.split("\n")
-    cleaned = []
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
-            cleaned.append(line)
-            continue
-        if re.search(r"[a-zA-Z0-9äöüÄÖÜß]", stripped):
-            cleaned.append(line)
-    text = "\n".join(cleaned)
-    return text.strip()
-
-
 class ChatEngine:
     """Channel-agnostic chat engine: LLM calls, tool execution, streaming."""
 
-    def __init__(self, ollama, db, skills, agent_router, system_prompt: str):
+    def __init__(
+        self, ollama, db, skills, agent_router, system_prompt: str,
+        summarizer=None, fact_queue=None, storage=None,
+    ):
         self.ollama = ollama
         self.db = db
         self.skills = skills
         self.agent_router = agent_router
         self.system_prompt = system_prompt
+        self.summarizer = summarizer
+        self.fact_queue = fact_queue
+        # StorageAccountant that is told about generated audio files
+        self.storage = storage
+        self.prefix_stats = PrefixTracker()
 
     async def handle_message(
         self,
@@ -73,6 +58,35 @@ class ChatEngine:
         Returns:
             The final assistant response text.
         """
+        # Background work (fact extraction) waits while interactive turns run
+        if self.fact_queue:
+            self.fact_queue.turn_started()
+        try:
+            # All LLM calls of this turn (including agent runs) share one deadline
+            return await run_with_deadline(Config.CHAT_TURN_DEADLINE, self._handle_message(
+                channel, session_id, user_message, image_b64,
+                tts_enabled, allowed_skills, agent_override,
+            ))
+        except LLMUnavailableError as e:
+            logger.warning(f"Turn in {session_id} aborted: {e}")
+            await channel.send_error(
+                "Das Sprachmodell ist gerade nicht erreichbar oder ueberlastet. Bitte versuche es gleich noch einmal."
+            )
+            return ""
+        finally:
+            if self.fact_queue:
+                self.fact_queue.turn_finished()
+
+    async def _handle_message(
+        self,
+        channel: ChannelAdapter,
+        session_id: str,
+        user_message: str,
+        image_b64: str | None,
+        tts_enabled: bool,
+        allowed_skills: list[str] | None,
+        agent_override: str | None,
+    ) -> str:
         display_text = user_message
         user_content = user_message
 
@@ -83,9 +97,20 @@ class ChatEngine:
 
         await self.db.save_message(session_id, "user", display_text)
 
-        history = await self.db.get_history(session_id, limit=Config.MAX_CONVERSATION_HISTORY)
-        memory_context = await build_memory_context(self.db)
-        system_content = self.system_prompt + memory_context
+        # Older turns live in the running summary; only newer ones are sent verbatim
+        summary, summarized_until = (
+            await self.db.get_summary(session_id) if self.summarizer else (None, 0)
+        )
+        history = await self.db.get_history(
+            session_id, limit=Config.MAX_CONVERSATION_HISTORY, after_id=summarized_until
+        )
+        # Prompt layout, from most to least stable: system prompt, core memories,
+        # summary, history, then the current message with its relevant memories.
+        # Tools are rendered by Ollama right after the system message.
+        core_memory, core_ids = await build_core_memory_context(self.db, limit=Config.MEMORY_CORE_LIMIT)
+        system_content = self.system_prompt + core_memory
+        if summary:
+            system_content += f"\n\nZusammenfassung des bisherigen Gespraechs:\n{summary}"
         messages = [{"role": "system", "content": system_content}]
         messages.extend(history)
 
@@ -96,27 +121,28 @@ class ChatEngine:
                 "images": [image_b64],
             }
 
+        relevant_memory = await build_relevant_memory_context(
+            self.db, user_content, limit=Config.MEMORY_RELEVANT_LIMIT, exclude=core_ids
+        )
+        if relevant_memory and len(messages) > 1 and messages[-1]["role"] == "user":
+            messages[-1] = {**messages[-1], "content": f"{messages[-1]['content']}\n\n{relevant_memory}"}
+
         # Direct agent mode: bypass normal LLM + tool loop
         if agent_override and agent_override != "general" and self.agent_router:
             await channel.send_tool_call(f"agent:{agent_override}", {"task": user_content})
 
-            result, events = await self.agent_router.run_agent(
-                agent_override, user_content, conversation_context=history
+            result, _ = await self.agent_router.run_agent(
+                agent_override, user_content, conversation_context=history,
+                on_event=partial(self._send_agent_event, channel, session_id),
             )
 
-            for event in events:
-                if event.get("type") == "tool_call":
-                    await channel.send_tool_call(event.get("tool", ""), event.get("args", {}))
-                elif event.get("type") == "image":
-                    await channel.send_image(event.get("src", ""), event.get("alt", ""))
-
             assistant_text = result
             await channel.send_message(assistant_text)
             await self.db.save_message(session_id, "assistant", assistant_text)
+            if self.summarizer:
+                self.summarizer.schedule(session_id)
 
-            asyncio.create_task(
-                extract_facts(self.ollama, self.db, display_text, assistant_text)
-            )
+            self._queue_fact_extraction(session_id, display_text, assistant_text)
             if tts_enabled:
                 asyncio.create_task(self._send_tts(channel, assistant_text))
 
@@ -124,11 +150,24 @@ class ChatEngine:
 
         # Build tool definitions filtered by allowed_skills
         tools = self._get_filtered_tools(allowed_skills)
+        budget = context_budget(self.ollama.model)
+        # The user message of this turn; tool rounds appended below belong to it
+        turn_start = len(messages) - 1
+        if Config.AGENT_MODEL_WARMUP and any(
+            t["function"]["name"] == "delegate_to_agent" for t in tools
+        ):
+            # Load the likely agent model while the main model decides whether to delegate
+            self.agent_router.warm_predicted(
+                user_content,
+                None if allowed_skills is None else self._get_allowed_agents(allowed_skills),
+                min_score=Config.AGENT_WARMUP_MIN_SCORE,
+            )
 
         max_tool_rounds = 5
         response = {}
+        streamed = False
         for _ in range(max_tool_rounds):
-            response = await self.ollama.chat(messages, tools=tools)
+            response, streamed = await self._stream_round(channel, fit_messages(messages, budget, tools), tools)
 
             if response.get("tool_calls"):
                 tool_calls = response["tool_calls"]
@@ -142,109 +181,83 @@ class ChatEngine:
                     else:
                         regular_calls.append(tc)
 
-                # Handle agent delegations sequentially
-                for tool_call in agent_calls:
-                    fn = tool_call.get("function", {})
+                # Agent delegations and regular tools all run concurrently; agents
+                # queue in the LLM scheduler at agent priority, each for its own model.
+                # Results are appended in call order.
+                delegations = asyncio.gather(*(
+                    self._delegate(channel, session_id, tc, history, allowed_skills) for tc in agent_calls
+                ), return_exceptions=True)
+                tasks = []
+                for tc in regular_calls:
+                    fn = tc.get("function", {})
+                    tool_name = fn.get("name", "")
                     tool_args = fn.get("arguments", {})
-                    agent_name = tool_args.get("agent", "")
-                    task = tool_args.get("task", "")
-
-                    # Check if agent is allowed for this user
-                    if not self._is_agent_allowed(agent_name, allowed_skills):
-                        messages.append({
-                            "role": "assistant",
-                            "content": "",
-                            "tool_calls": [tool_call],
-                        })
-                        messages.append({
-                            "role": "tool",
-                            "name": "delegate_to_agent",
-                            "content": f"Fehler: Zugriff auf Agent '{agent_name}' nicht erlaubt.",
-                        })
-                        continue
-
-                    logger.info(f"Tool call: delegate_to_agent({tool_args})")
-
-                    await channel.send_tool_call(f"agent:{agent_name}", {"task": task})
-
-                    result, events = await self.agent_router.run_agent(
-                        agent_name, task, conversation_context=history
-                    )
-
-                    for event in events:
-                        if event.get("type") == "tool_call":
-                            await channel.send_tool_call(event.get("tool", ""), event.get("args", {}))
-                        elif event.get("type") == "image":
-                            await channel.send_image(event.get("src", ""), event.get("alt", ""))
+                    logger.info(f"Tool call: {tool_name}({tool_args})")
+                    tasks.append(self._execute_tool(tool_name, tool_args, channel, session_id, allowed_skills))
+                agent_results, results = await asyncio.gather(
+                    delegations, asyncio.gather(*tasks, return_exceptions=True)
+                )
 
+                for tc, res in zip(agent_calls, agent_results):
+                    if isinstance(res, Exception):
+                        logger.exception("Agent delegation failed", exc_info=res)
+                        res = f"Fehler: {res}"
                     messages.append({
                         "role": "assistant",
                         "content": "",
-                        "tool_calls": [tool_call],
+                        "tool_calls": [tc],
                     })
                     messages.append({
                         "role": "tool",
                         "name": "delegate_to_agent",
-                        "content": f"[Antwort von Agent '{agent_name}']\n{result}",
+                        "content": res,
                     })
 
-                # Execute regular tools in parallel
-                if regular_calls:
-                    tasks = []
-                    for tc in regular_calls:
-                        fn = tc.get("function", {})
-                        tool_name = fn.get("name", "")
-                        tool_args = fn.get("arguments", {})
-                        logger.info(f"Tool call: {tool_name}({tool_args})")
-                        tasks.append(self._execute_tool(tool_name, tool_args, channel, allowed_skills))
-
-                    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                    for tc, res in zip(regular_calls, results):
-                        fn = tc.get("function", {})
-                        tool_name = fn.get("name", "")
-                        if isinstance(res, Exception):
-                            result_text = f"Fehler: {res}"
-                            logger.exception(f"Tool {tool_name} failed", exc_info=res)
-                        else:
-                            _, result_text = res
-
-                        messages.append({
-                            "role": "assistant",
-                            "content": "",
-                            "tool_calls": [tc],
-                        })
-                        messages.append({
-                            "role": "tool",
-                            "name": tool_name,
-                            "content": f"[Ergebnis von {tool_name}]\n{result_text}",
-                        })
+                for tc, res in zip(regular_calls, results):
+                    fn = tc.get("function", {})
+                    tool_name = fn.get("name", "")
+                    if isinstance(res, Exception):
+                        result_text = f"Fehler: {res}"
+                        logger.exception(f"Tool {tool_name} failed", exc_info=res)
+                    else:
+                        _, result_text = res
+
+                    messages.append({
+                        "role": "assistant",
+                        "content": "",
+                        "tool_calls": [tc],
+                    })
+                    messages.append({
+                        "role": "tool",
+                        "name": tool_name,
+                        "content": f"[Ergebnis von {tool_name}]\n{result_text}",
+                    })
             else:
                 break
 
-        assistant_text = _strip_think(response.get("content", ""))
+        assistant_text = strip_think(response.get("content", ""))
 
-        if not assistant_text and len(messages) > 2:
+        if streamed and not response.get("tool_calls"):
+            # Answer was already streamed live during the last round
+            await channel.send_stream_end()
+            if not assistant_text:
+                assistant_text = "Ich konnte leider keine Antwort generieren."
+                await channel.send_message(assistant_text)
+        elif not assistant_text and len(messages) > 2:
             messages.append({
                 "role": "user",
                 "content": "Fasse die Ergebnisse der Tool-Aufrufe zusammen und beantworte meine urspruengliche Frage basierend auf den erhaltenen Daten.",
             })
-            raw_text = ""
+            think_filter = ThinkFilter()
             streaming_started = False
-            async for token in self.ollama.chat_stream(messages):
-                raw_text += token
-                if not streaming_started:
-                    if "<think>" in raw_text.lower() and "</think>" not in raw_text.lower():
-                        continue
-                    streaming_started = True
-                    cleaned = _strip_think(raw_text)
-                    if cleaned:
-                        assistant_text = cleaned
-                        await channel.send_stream_token(cleaned)
-                else:
-                    assistant_text += token
-                    await channel.send_stream_token(token)
-            assistant_text = _strip_think(raw_text)
+            fitted = fit_messages(messages, budget, turn_start=turn_start)
+            self.prefix_stats.observe(self.ollama.model, fitted)
+            async for token in self.ollama.chat_stream(fitted):
+                streaming_started = await self._forward_stream(
+                    channel, think_filter.feed(token), streaming_started
+                )
+            await self._forward_stream(channel, think_filter.flush(), streaming_started)
+            assistant_text = strip_think(think_filter.text)
             await channel.send_stream_end()
         elif assistant_text:
             await channel.send_message(assistant_text)
@@ -253,16 +266,111 @@ class ChatEngine:
             await channel.send_message(assistant_text)
 
         await self.db.save_message(session_id, "assistant", assistant_text)
+        if self.summarizer:
+            self.summarizer.schedule(session_id)
 
-        asyncio.create_task(
-            extract_facts(self.ollama, self.db, display_text, assistant_text)
-        )
+        self._queue_fact_extraction(session_id, display_text, assistant_text)
 
         if tts_enabled:
             asyncio.create_task(self._send_tts(channel, assistant_text))
 
         return assistant_text
 
+    async def _stream_round(
+        self, channel: ChannelAdapter, messages: list[dict], tools: list[dict]
+    ) -> tuple[dict, bool]:
+        """Run one LLM round, streaming visible content to the channel as it arrives.
+
+        Returns (response message, whether any content was streamed). Content
+        streamed before a tool call in the same round is closed as its own message.
+        If the stream ends without a final message, the tokens already shown
+        become the response content.
+        """
+        self.prefix_stats.observe(self.ollama.model, messages, tools)
+        think_filter = ThinkFilter()
+        streamed = False
+        tokens: list[str] = []
+        async for chunk in self.ollama.chat_stream_tools(messages, tools=tools):
+            if "message" in chunk:
+                response = chunk["message"]
+                break
+            tokens.append(chunk["token"])
+            streamed = await self._forward_stream(channel, think_filter.feed(chunk["token"]), streamed)
+        else:
+            response = {"role": "assistant", "content": "".join(tokens)}
+        streamed = await self._forward_stream(channel, think_filter.flush(), streamed)
+
+        if streamed and response.get("tool_calls"):
+            await channel.send_stream_end()
+            streamed = False
+        return response, streamed
+
+    async def _forward_stream(
+        self, channel: ChannelAdapter, parts: tuple[str, str], started: bool
+    ) -> bool:
+        """Send filtered (visible, reasoning) text to the channel. Returns whether visible streaming has started."""
+        visible, thinking = parts
+        if thinking and Config.STREAM_THINKING:
+            await channel.send_thinking_token(thinking)
+        if not started:
+            visible = visible.lstrip()
+        if visible:
+            await channel.send_stream_token(visible)
+            return True
+        return started
+
+    async def _delegate(
+        self,
+        channel: ChannelAdapter,
+        session_id: str,
+        tool_call: dict,
+        history: list[dict],
+        allowed_skills: list[str] | None,
+    ) -> str:
+        """Run one delegate_to_agent call and return the tool message content.
+
+        The agent's tool calls and images are sent to the channel as they happen.
+        """
+        tool_args = tool_call.get("function", {}).get("arguments", {})
+        agent_name = tool_args.get("agent", "")
+        task = tool_args.get("task", "")
+
+        # Check if agent is allowed for this user
+        if not self._is_agent_allowed(agent_name, allowed_skills):
+            return f"Fehler: Zugriff auf Agent '{agent_name}' nicht erlaubt."
+
+        logger.info(f"Tool call: delegate_to_agent({tool_args})")
+        await channel.send_tool_call(f"agent:{agent_name}", {"task": task})
+
+        result, _ = await self.agent_router.run_agent(
+            agent_name, task, conversation_context=history,
+            on_event=partial(self._send_agent_event, channel, session_id),
+        )
+        return f"[Antwort von Agent '{agent_name}']\n{result}"
+
+    async def _send_agent_event(self, channel: ChannelAdapter, session_id: str, event: dict):
+        if event.get("type") == "tool_call":
+            await channel.send_tool_call(event.get("tool", ""), event.get("args", {}))
+        elif event.get("type") == "image":
+            await self._show_image(channel, session_id, event.get("src", ""), event.get("alt", ""))
+
+    async def _show_image(self, channel: ChannelAdapter, session_id: str, src: str, alt: str):
+        """Send a generated image and keep it referenced while the conversation exists."""
+        await self.db.add_file_reference(session_id, src)
+        await channel.send_image(src, alt)
+
+    def _queue_fact_extraction(self, session_id: str, user_text: str, assistant_text: str):
+        if self.fact_queue:
+            self.fact_queue.add_turn(session_id, user_text, assistant_text)
+        else:
+            asyncio.create_task(run_with_priority(
+                Priority.BACKGROUND, self._extract_facts_detached(user_text, assistant_text)
+            ))
+
+    async def _extract_facts_detached(self, user_text: str, assistant_text: str):
+        current_deadline.set(None)
+        await extract_facts(self.ollama, self.db, user_text, assistant_text)
+
     def _get_filtered_tools(self, allowed_skills: list[str] | None) -> list[dict]:
         """Get tool definitions filtered by allowed skills."""
         if allowed_skills is None:
@@ -304,6 +412,7 @@ class ChatEngine:
         tool_name: str,
         tool_args: dict,
         channel: ChannelAdapter,
+        session_id: str,
         allowed_skills: list[str] | None,
     ) -> tuple[str, str]:
         """Execute a single tool and return (tool_name, result)."""
@@ -326,7 +435,7 @@ class ChatEngine:
             r'!\[([^\]]*)\]\((\/generated\/[^)]+)\)', result or ""
         )
         for alt, src in img_matches:
-            await channel.send_image(src, alt)
+            await self._show_image(channel, session_id, src, alt)
 
         if img_matches:
             result = re.sub(r'!\[([^\]]*)\]\(\/generated\/[^)]+\)', '[Bild wurde angezeigt]', result)
@@ -340,6 +449,8 @@ class ChatEngine:
                 text, Config.TTS_VOICE, Config.GENERATED_AUDIO_DIR
             )
             if audio_filename:
+                if self.storage:
+                    self.storage.add_file(Config.GENERATED_AUDIO_DIR / audio_filename)
                 await channel.send_audio(f"/generated/audio/{audio_filename}")
         except Exception:
             logger.debug("TTS background task failed (client may have disconnected)")
@@ -0,0 +1,68 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+from chat.context_assembler import message_tokens, tools_tokens
+
+
+def _digest(obj) -> str:
+    return hashlib.sha1(
+        json.dumps(obj, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def prompt_hashes(messages: list[dict], tools: list[dict] | None = None) -> list[str]:
+    """Hash of the tool definitions followed by one hash per message, in prompt order."""
+    return [_digest(tools or [])] + [_digest(m) for m in messages]
+
+
+class PrefixTracker:
+    """Measures how much of each prompt repeats the previous prompt of the same stream.
+
+    Ollama reuses its KV cache for the longest prefix shared with the last
+    prompt of a model, so the share of tokens in the repeated leading part
+    (tools + messages) approximates the server-side prompt cache hit rate.
+    """
+
+    def __init__(self, max_streams: int = 256):
+        self.max_streams = max_streams
+        self._last: OrderedDict[str, list[str]] = OrderedDict()
+        self.requests = 0
+        self.prefix_hits = 0
+        self.prompt_tokens = 0
+        self.reused_tokens = 0
+
+    def observe(self, key: str, messages: list[dict], tools: list[dict] | None = None) -> int:
+        """Record a prompt. Returns the estimated number of tokens shared with the previous one."""
+        hashes = prompt_hashes(messages, tools)
+        sizes = [tools_tokens(tools)] + [message_tokens(m) for m in messages]
+        previous = self._last.get(key, [])
+
+        shared = 0
+        for a, b in zip(previous, hashes):
+            if a != b:
+                break
+            shared += 1
+        reused = sum(sizes[:shared])
+
+        self.requests += 1
+        # Tools and system message unchanged: the stable prefix was hit
+        if shared >= 2:
+            self.prefix_hits += 1
+        self.prompt_tokens += sum(sizes)
+        self.reused_tokens += reused
+
+        self._last[key] = hashes
+        self._last.move_to_end(key)
+        while len(self._last) > self.max_streams:
+            self._last.popitem(last=False)
+        return reused
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "prefix_hit_rate": round(self.prefix_hits / self.requests, 3) if self.requests else 0.0,
+            "reused_token_ratio": (
+                round(self.reused_tokens / self.prompt_tokens, 3) if self.prompt_tokens else 0.0
+            ),
+        }
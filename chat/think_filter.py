@@ -0,0 +1,122 @@
+import re
+
+_TAGS = ("<think>", "</think>", "<tool_call>", "</tool_call>")
+_MAX_TAG_LEN = max(len(t) for t in _TAGS)
+# Lines without any letter or digit are model filler (stray punctuation, separators)
+_CONTENT_RE = re.compile(r"[a-zA-Z0-9äöüÄÖÜß]")
+
+TEXT = "text"
+THINK = "think"
+TOOL_CALL = "tool_call"
+
+
+class ThinkFilter:
+    """Incremental splitter for streamed LLM output.
+
+    Tokens are fed in as they arrive; <think> spans come out as reasoning,
+    <tool_call> spans are dropped and everything else is visible text.
+    Tags split across tokens are held back until they are complete, so each
+    character is inspected a constant number of times.
+    """
+
+    def __init__(self):
+        self.state = TEXT
+        self._pending = ""
+        self._skip_ws = False
+        self._visible: list[str] = []
+        self._thinking: list[str] = []
+
+    def feed(self, token: str) -> tuple[str, str]:
+        """Consume a token. Returns (new visible text, new reasoning text)."""
+        buf = self._pending + token
+        self._pending = ""
+        visible: list[str] = []
+        thinking: list[str] = []
+        i = 0
+        while i < len(buf):
+            j = buf.find("<", i)
+            if j == -1:
+                self._emit(buf[i:], visible, thinking)
+                break
+            self._emit(buf[i:j], visible, thinking)
+            head = buf[j:j + _MAX_TAG_LEN].lower()
+            tag = next((t for t in _TAGS if head.startswith(t)), None)
+            if tag:
+                self._on_tag(tag, visible, thinking)
+                i = j + len(tag)
+            elif j + len(head) == len(buf) and any(t.startswith(head) for t in _TAGS):
+                # Possibly the start of a tag that continues in the next token
+                self._pending = buf[j:]
+                break
+            else:
+                self._emit("<", visible, thinking)
+                i = j + 1
+        return "".join(visible), "".join(thinking)
+
+    def flush(self) -> tuple[str, str]:
+        """Release text held back as a possible partial tag at the end of the stream."""
+        visible: list[str] = []
+        thinking: list[str] = []
+        if self._pending:
+            self._emit(self._pending, visible, thinking)
+            self._pending = ""
+        return "".join(visible), "".join(thinking)
+
+    @property
+    def text(self) -> str:
+        """All visible text so far (an unclosed <think> hides everything after it)."""
+        return "".join(self._visible)
+
+    @property
+    def thinking(self) -> str:
+        return "".join(self._thinking)
+
+    def _emit(self, s: str, visible: list[str], thinking: list[str]):
+        if not s:
+            return
+        if self.state == TEXT:
+            if self._skip_ws:
+                s = s.lstrip()
+                if not s:
+                    return
+                self._skip_ws = False
+            visible.append(s)
+            self._visible.append(s)
+        elif self.state == THINK:
+            thinking.append(s)
+            self._thinking.append(s)
+
+    def _on_tag(self, tag: str, visible: list[str], thinking: list[str]):
+        if self.state == TEXT:
+            if tag == "<think>":
+                self.state = THINK
+            elif tag == "<tool_call>":
+                self.state = TOOL_CALL
+            elif tag == "</think>":
+                # Closing tag without an opening one: everything before it was reasoning
+                self._thinking.extend(self._visible)
+                self._visible.clear()
+                self._skip_ws = True
+            return
+        if (self.state == THINK and tag == "</think>") or (self.state == TOOL_CALL and tag == "</tool_call>"):
+            self.state = TEXT
+            self._skip_ws = True
+        elif self.state == THINK:
+            self._emit(tag, visible, thinking)
+
+
+def clean_output(text: str) -> str:
+    """Drop filler lines (no letters or digits) and surrounding whitespace."""
+    lines = [
+        line for line in text.split("\n")
+        if not line.strip() or _CONTENT_RE.search(line)
+    ]
+    return "\n".join(lines).strip()
+
+
+def strip_think(text: str) -> str:
+    """Remove <think>...</think>, <tool_call>...</tool_call> blocks and model filler from output."""
+    f = ThinkFilter()
+    f.feed(text)
+    f.flush()
+    return clean_output(f.text)
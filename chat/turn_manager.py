@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+Turn = Callable[[], Awaitable[None]]
+
+
+class TurnManager:
+    """Runs the turns of one chat session in order, apart from reading the socket.
+
+    Submitted turns wait in a bounded queue while one runs. stop() cancels
+    the running turn and drops the queued ones; cancelling a turn aborts its
+    Ollama streams, agent runs and tool tasks, so the model stops generating.
+    """
+
+    def __init__(self, max_queued: int = 3):
+        self._queue: asyncio.Queue[Turn] = asyncio.Queue(maxsize=max(max_queued, 1))
+        self._current: asyncio.Task | None = None
+        self._worker: asyncio.Task | None = None
+
+    @property
+    def busy(self) -> bool:
+        return self._current is not None and not self._current.done()
+
+    def submit(self, turn: Turn) -> bool:
+        """Queue a turn. Returns False if the queue is full."""
+        try:
+            self._queue.put_nowait(turn)
+        except asyncio.QueueFull:
+            return False
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return True
+
+    async def _run(self):
+        while not self._queue.empty():
+            turn = self._queue.get_nowait()
+            current = self._current = asyncio.create_task(turn())
+            try:
+                # wait() neither raises for the turn's outcome nor cancels it,
+                # so a stopped turn is told apart from a cancelled worker
+                await asyncio.wait({current})
+            except asyncio.CancelledError:
+                current.cancel()
+                raise
+            finally:
+                self._current = None
+            if not current.cancelled() and current.exception():
+                logger.error("Chat turn failed", exc_info=current.exception())
+
+    async def stop(self) -> bool:
+        """Cancel the running turn and drop queued ones. Returns whether anything was stopped."""
+        dropped = 0
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            dropped += 1
+        current = self._current
+        if current is None or current.done():
+            return dropped > 0
+        current.cancel()
+        # Its outcome is collected by _run; a cancelled caller still raises here
+        await asyncio.wait({current})
+        return True
+
+    async def close(self):
+        """Stop everything (connection closed)."""
+        await self.stop()
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
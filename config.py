@@ -9,6 +9,10 @@ BASE_DIR = Path(__file__).resolve().parent
 
 class Config:
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    # Additional Ollama servers, comma-separated; requests are balanced across all of them
+    OLLAMA_BACKENDS: list[str] = [OLLAMA_BASE_URL] + [
+        u.strip() for u in os.getenv("OLLAMA_BACKENDS", "").split(",") if u.strip()
+    ]
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "huihui_ai/qwen3-abliterated:14b")
     OLLAMA_EMBEDDING_MODEL: str = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
 
@@ -22,6 +26,13 @@ class Config:
     SD_HR_UPSCALER: str = os.getenv("SD_HR_UPSCALER", "R-ESRGAN 4x+")
 
     DB_PATH: Path = Path(os.getenv("DB_PATH", str(BASE_DIR / "data" / "clara.db")))
+    MEMORY_INDEX_PATH: Path = Path(os.getenv("MEMORY_INDEX_PATH", str(DB_PATH.parent / "memory_index.npy")))
+    # Group-commit writes: batch statements for up to N ms or N statements per transaction
+    DB_WRITE_BEHIND: bool = os.getenv("DB_WRITE_BEHIND", "false").lower() == "true"
+    DB_WRITE_BATCH_MS: int = int(os.getenv("DB_WRITE_BATCH_MS", "5"))
+    DB_WRITE_BATCH_SIZE: int = int(os.getenv("DB_WRITE_BATCH_SIZE", "100"))
+    # Read-only connections for queries, so reads don't queue behind writes (0 = use the writer)
+    DB_READ_POOL_SIZE: int = int(os.getenv("DB_READ_POOL_SIZE", "3"))
     LOG_DIR: Path = Path(os.getenv("LOG_DIR", str(BASE_DIR / "data" / "logs")))
     STATIC_DIR: Path = BASE_DIR / "web" / "static"
     GENERATED_IMAGES_DIR: Path = Path(os.getenv("GENERATED_IMAGES_DIR", str(BASE_DIR / "data" / "generated_images")))
@@ -37,6 +48,88 @@ class Config:
     )
 
     MAX_CONVERSATION_HISTORY: int = int(os.getenv("MAX_CONVERSATION_HISTORY", "20"))
+    # Web chat messages queued per session while a turn is running
+    CHAT_MAX_QUEUED_TURNS: int = int(os.getenv("CHAT_MAX_QUEUED_TURNS", "3"))
+    # In-memory ring buffer of recent messages per active session (LRU across sessions)
+    HISTORY_CACHE_SESSIONS: int = int(os.getenv("HISTORY_CACHE_SESSIONS", "256"))
+    HISTORY_CACHE_MESSAGES: int = max(int(os.getenv("HISTORY_CACHE_MESSAGES", "50")), MAX_CONVERSATION_HISTORY)
+    # Rolling summary: fold older turns once SUMMARY_BATCH messages wait beyond the SUMMARY_KEEP_RECENT raw ones
+    SUMMARY_ENABLED: bool = os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+    SUMMARY_KEEP_RECENT: int = int(os.getenv("SUMMARY_KEEP_RECENT", "8"))
+    SUMMARY_BATCH: int = int(os.getenv("SUMMARY_BATCH", "8"))
+    # Fact extraction runs per session after it has been quiet this long (or after N turns)
+    FACT_EXTRACTION_DEBOUNCE_SECONDS: int = int(os.getenv("FACT_EXTRACTION_DEBOUNCE_SECONDS", "30"))
+    FACT_EXTRACTION_MAX_TURNS: int = int(os.getenv("FACT_EXTRACTION_MAX_TURNS", "5"))
+    # Prompt token budget (system + memory + history + tool results) per model.
+    # MODEL_CONTEXT_BUDGETS overrides it per model: "model=tokens,model2=tokens"
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "8192"))
+    CONTEXT_RESPONSE_RESERVE: int = int(os.getenv("CONTEXT_RESPONSE_RESERVE", "1024"))
+    MODEL_CONTEXT_BUDGETS: dict[str, int] = {
+        name.strip(): int(tokens)
+        for name, _, tokens in (
+            entry.rpartition("=") for entry in os.getenv("MODEL_CONTEXT_BUDGETS", "").split(",")
+        )
+        if name.strip() and tokens.strip().isdigit()
+    }
+    # Concurrent requests per model and backend; OLLAMA_MODEL_CONCURRENCY overrides it: "model=n,model2=n"
+    OLLAMA_MAX_CONCURRENCY: int = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "1"))
+    OLLAMA_MODEL_CONCURRENCY: dict[str, int] = {
+        name.strip(): int(limit)
+        for name, _, limit in (
+            entry.rpartition("=") for entry in os.getenv("OLLAMA_MODEL_CONCURRENCY", "").split(",")
+        )
+        if name.strip() and limit.strip().isdigit()
+    }
+    # Send the model's <think> reasoning to the web UI as a separate, collapsible stream
+    STREAM_THINKING: bool = os.getenv("STREAM_THINKING", "true").lower() == "true"
+    # How long Ollama keeps models loaded after a request (main model vs. agent/helper models)
+    OLLAMA_KEEP_ALIVE: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    AGENT_KEEP_ALIVE: str = os.getenv("AGENT_KEEP_ALIVE", "10m")
+    # Load the main model at startup / the likely agent model when delegation is offered
+    MODEL_PRELOAD: bool = os.getenv("MODEL_PRELOAD", "true").lower() == "true"
+    # Off by default: on a single GPU the agent model can evict the main model mid-turn
+    AGENT_MODEL_WARMUP: bool = os.getenv("AGENT_MODEL_WARMUP", "false").lower() == "true"
+    # Matching words a message needs before the predicted agent's model is warmed
+    AGENT_WARMUP_MIN_SCORE: float = float(os.getenv("AGENT_WARMUP_MIN_SCORE", "2"))
+    # Memories always in the system prompt vs. picked per message by similarity
+    MEMORY_CORE_LIMIT: int = int(os.getenv("MEMORY_CORE_LIMIT", "30"))
+    MEMORY_RELEVANT_LIMIT: int = int(os.getenv("MEMORY_RELEVANT_LIMIT", "10"))
+    # Ollama resilience: retries with jittered backoff, per-backend circuit breaker
+    OLLAMA_RETRIES: int = int(os.getenv("OLLAMA_RETRIES", "2"))
+    OLLAMA_RETRY_BASE_DELAY: float = float(os.getenv("OLLAMA_RETRY_BASE_DELAY", "0.5"))
+    OLLAMA_BREAKER_THRESHOLD: int = int(os.getenv("OLLAMA_BREAKER_THRESHOLD", "3"))
+    OLLAMA_BREAKER_RESET_SECONDS: int = int(os.getenv("OLLAMA_BREAKER_RESET_SECONDS", "30"))
+    # Deadlines (seconds) for all LLM calls of a chat turn, an agent run and an automation
+    CHAT_TURN_DEADLINE: int = int(os.getenv("CHAT_TURN_DEADLINE", "300"))
+    AGENT_DEADLINE: int = int(os.getenv("AGENT_DEADLINE", "240"))
+    AUTOMATION_DEADLINE: int = int(os.getenv("AUTOMATION_DEADLINE", "180"))
+    # Shared outbound HTTP connection pool (Ollama, Stable Diffusion, web fetches)
+    HTTP_POOL_LIMIT: int = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+    HTTP_LIMIT_PER_HOST: int = int(os.getenv("HTTP_LIMIT_PER_HOST", "16"))
+    HTTP_KEEPALIVE_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+    HTTP_DNS_CACHE_TTL: int = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+    # Opt-in cache for deterministic LLM calls (temperature 0 or opted in); persist = keep in SQLite
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_SIZE: int = int(os.getenv("LLM_CACHE_SIZE", "512"))
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", "3600"))
+    LLM_CACHE_PERSIST: bool = os.getenv("LLM_CACHE_PERSIST", "false").lower() == "true"
+    # Tool calls running at once (engine, agents, scripts) and default timeout per call
+    TOOL_MAX_CONCURRENCY: int = int(os.getenv("TOOL_MAX_CONCURRENCY", "8"))
+    TOOL_TIMEOUT: int = int(os.getenv("TOOL_TIMEOUT", "120"))
+    # Dashboard push feed: sections without change events are reloaded at this interval while watched
+    DASHBOARD_REFRESH_SECONDS: int = int(os.getenv("DASHBOARD_REFRESH_SECONDS", "60"))
+    # Full rescan of data directories to correct storage counters (minutes)
+    STORAGE_RECONCILE_MINUTES: int = int(os.getenv("STORAGE_RECONCILE_MINUTES", "60"))
+    # Retention of generated/uploaded files (0 = no limit). Opt-in: it deletes user files
+    STORAGE_GC_ENABLED: bool = os.getenv("STORAGE_GC_ENABLED", "false").lower() == "true"
+    STORAGE_GC_CRON: str = os.getenv("STORAGE_GC_CRON", "30 4 * * *")
+    GC_IMAGES_MAX_AGE_DAYS: float = float(os.getenv("GC_IMAGES_MAX_AGE_DAYS", "90"))
+    GC_IMAGES_MAX_MB: int = int(os.getenv("GC_IMAGES_MAX_MB", "5000"))
+    GC_AUDIO_MAX_AGE_DAYS: float = float(os.getenv("GC_AUDIO_MAX_AGE_DAYS", "7"))
+    GC_AUDIO_MAX_MB: int = int(os.getenv("GC_AUDIO_MAX_MB", "500"))
+    GC_UPLOADS_MAX_AGE_DAYS: float = float(os.getenv("GC_UPLOADS_MAX_AGE_DAYS", "30"))
+    GC_UPLOADS_MAX_MB: int = int(os.getenv("GC_UPLOADS_MAX_MB", "1000"))
     WEB_REQUEST_TIMEOUT: int = 15
     HEARTBEAT_INTERVAL_MINUTES: int = 5
 
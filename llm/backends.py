@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from typing import Callable
+
+import aiohttp
+
+from llm.resilience import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+
+class Backend:
+    """One Ollama server and what is known about it."""
+
+    def __init__(self, url: str, failure_threshold: int = 3, reset_timeout: float = 30):
+        self.url = url.rstrip("/")
+        self.models: set[str] | None = None  # None = inventory not fetched yet
+        self.loaded: set[str] = set()
+        self.in_flight = 0
+        self.queued = 0  # requests waiting for one of its slots
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.last_error: str | None = None
+        self.requests = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.breaker.state == "closed"
+
+    def has_model(self, model: str) -> bool:
+        if self.models is None:
+            return True
+        return model in self.models or f"{model}:latest" in self.models
+
+    def available(self) -> bool:
+        return self.breaker.allow()
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "state": self.breaker.state,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "requests": self.requests,
+            "failures": self.breaker.failures,
+            "trips": self.breaker.trips,
+            "last_error": self.last_error,
+            "models": len(self.models) if self.models is not None else None,
+            "loaded": sorted(self.loaded),
+        }
+
+
+class BackendPool:
+    """Routes requests across several Ollama servers.
+
+    Backends are ranked per request: those that have the model installed
+    come first, preferring the fewest requests running or queued and then
+    those that already have the model loaded. Failed requests count against
+    a backend's circuit breaker (passive health check); while it is open
+    the backend gets no requests at all.
+    """
+
+    def __init__(self, urls: list[str], failure_threshold: int = 3, reset_timeout: float = 30):
+        self.backends = [
+            Backend(u, failure_threshold, reset_timeout)
+            for u in dict.fromkeys(u.rstrip("/") for u in urls)
+        ]
+        # Called when a backend goes down or recovers
+        self.on_health_change: Callable[[], None] | None = None
+
+    def candidates(self, model: str) -> list[Backend]:
+        """Backends that accept requests for model, best first."""
+        return sorted(
+            (b for b in self.backends if b.available()),
+            key=lambda b: (
+                not b.has_model(model),
+                b.in_flight + b.queued,
+                model not in b.loaded,
+            ),
+        )
+
+
+    def mark_success(self, backend: Backend, model: str):
+        recovered = not backend.healthy
+        backend.breaker.record_success()
+        backend.last_error = None
+        backend.loaded.add(model)
+        if recovered:
+            logger.info(f"Ollama backend {backend.url} recovered")
+            self._health_changed()
+
+    def mark_failure(self, backend: Backend, error: BaseException):
+        backend.last_error = str(error) or type(error).__name__
+        if backend.breaker.record_failure():
+            logger.warning(
+                f"Ollama backend {backend.url}: circuit opened after "
+                f"{backend.breaker.failures} failures ({backend.last_error})"
+            )
+            self._health_changed()
+
+    def _health_changed(self):
+        if self.on_health_change:
+            self.on_health_change()
+
+    async def refresh(self, session: aiohttp.ClientSession) -> int:
+        """Fetch model inventory and loaded models of every backend. Returns how many answered.
+
+        Backends with an open breaker are not probed, so a dead backend shows
+        as down immediately. A successful probe does not close a breaker
+        either; only a real request can do that.
+        """
+        results = await asyncio.gather(*(
+            self._refresh_one(session, b) for b in self.backends if b.available()
+        ))
+        return sum(results)
+
+    async def _refresh_one(self, session: aiohttp.ClientSession, backend: Backend) -> bool:
+        try:
+            timeout = aiohttp.ClientTimeout(total=5)
+            async with session.get(f"{backend.url}/api/tags", timeout=timeout) as resp:
+                resp.raise_for_status()
+                tags = await resp.json()
+            async with session.get(f"{backend.url}/api/ps", timeout=timeout) as resp:
+                ps = await resp.json() if resp.status == 200 else {}
+        except Exception as e:
+            self.mark_failure(backend, e)
+            return False
+        backend.models = {m.get("name") or m.get("model") for m in tags.get("models", [])}
+        backend.loaded = set()
+        for m in ps.get("models", []):
+            name = m.get("name") or m.get("model") or ""
+            backend.loaded.add(name)
+            backend.loaded.add(name.removesuffix(":latest"))
+        return True
+
+    def loaded_models(self) -> set[str]:
+        return {m for b in self.backends if b.healthy for m in b.loaded}
+
+    def stats(self) -> list[dict]:
+        return [b.stats() for b in self.backends]
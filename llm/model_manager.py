@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import re
+import time
+
+from llm.resilience import current_deadline
+from llm.scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+_DURATION_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*([smh]?)\s*$")
+_UNIT_SECONDS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_keep_alive(value: str | int) -> float:
+    """Seconds an Ollama keep_alive value keeps a model loaded (inf for negative values)."""
+    match = _DURATION_RE.match(str(value))
+    if not match:
+        return 300.0
+    seconds = float(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+    return float("inf") if seconds < 0 else seconds
+
+
+class ModelResidency:
+    """Tracks which models Ollama has loaded and keeps the important ones warm.
+
+    Every request carries a keep_alive for its model (longer for the main
+    model than for agent models). Residency is tracked locally from those
+    requests and reconciled with /api/ps of the backends; warm() loads a model ahead of use
+    with an empty prompt, at most once at a time per model.
+    """
+
+    def __init__(self, client, keep_alive: str = "30m", default_keep_alive: str = "10m"):
+        self.client = client
+        self.keep_alive_main = keep_alive
+        self.keep_alive_default = default_keep_alive
+        # model -> monotonic time its keep_alive runs out
+        self._resident: dict[str, float] = {}
+        self._warming: dict[str, asyncio.Task] = {}
+        self.warmups = 0
+        self.cold_loads = 0
+
+    def keep_alive(self, model: str) -> str:
+        return self.keep_alive_main if model == self.client.model else self.keep_alive_default
+
+    def is_resident(self, model: str) -> bool:
+        return self._resident.get(model, 0) > time.monotonic()
+
+    def touch(self, model: str):
+        """Record that a request for model just finished (its keep_alive restarts)."""
+        self._resident[model] = time.monotonic() + parse_keep_alive(self.keep_alive(model))
+
+    def note_request(self, model: str):
+        if not self.is_resident(model) and model not in self._warming:
+            self.cold_loads += 1
+            logger.info(f"Model '{model}' is not resident - request pays a cold load")
+
+    def warm(self, model: str) -> asyncio.Task | None:
+        """Load model in the background unless it is resident or already loading."""
+        if not model or self.is_resident(model):
+            return None
+        task = self._warming.get(model)
+        if task and not task.done():
+            return task
+        task = asyncio.create_task(self._preload(model))
+        self._warming[model] = task
+        return task
+
+    async def _preload(self, model: str):
+        # Not bound by the deadline of the turn that triggered the warm-up
+        current_deadline.set(None)
+        t0 = time.perf_counter()
+        try:
+            payload = {"model": model, "keep_alive": self.keep_alive(model)}
+            async with self.client._post("/api/generate", payload, timeout=300, priority=Priority.BACKGROUND) as resp:
+                resp.raise_for_status()
+                await resp.read()
+            self.touch(model)
+            self.warmups += 1
+            logger.info(f"Model '{model}' warmed in {time.perf_counter() - t0:.1f}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Warm-up of model '{model}' failed: {e}")
+        finally:
+            self._warming.pop(model, None)
+
+    def sync(self):
+        """Reconcile local residency with the models the backends last reported as loaded."""
+        now = time.monotonic()
+        loaded = self.client.pool.loaded_models()
+        for model in list(self._resident):
+            if model not in loaded:
+                del self._resident[model]
+        for model in loaded:
+            if model and not self.is_resident(model):
+                self._resident[model] = now + parse_keep_alive(self.keep_alive(model))
+
+    async def refresh(self) -> list[str]:
+        """Ask the backends which models are loaded and return the resident ones."""
+        await self.client.is_available()
+        return self.resident_models()
+
+    def resident_models(self) -> list[str]:
+        return sorted(m for m in self._resident if self.is_resident(m))
+
+    async def close(self):
+        for task in list(self._warming.values()):
+            task.cancel()
+        self._warming.clear()
+
+    def stats(self) -> dict:
+        return {
+            "resident": self.resident_models(),
+            "warming": sorted(self._warming),
+            "warmups": self.warmups,
+            "cold_loads": self.cold_loads,
+        }
@@ -1,24 +1,222 @@
+import asyncio
 import logging
 import json
 import aiohttp
 from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from llm.backends import BackendPool
+from llm.model_manager import ModelResidency
+from llm.resilience import DeadlineExceeded, LLMUnavailableError, backoff_delay, deadline_remaining
+from llm.response_cache import ResponseCache, cache_key, is_deterministic
+from llm.scheduler import Priority, RequestScheduler
 
 logger = logging.getLogger(__name__)
 
+# Errors that make a backend unusable for the moment; the next backend is tried
+_BACKEND_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+
+def _hit_deadline(error: BaseException, capped: bool) -> bool:
+    """Whether error is an attempt timeout that was cut short by the caller's deadline.
+
+    Such a timeout says nothing about the backend, so it must not count
+    against its circuit breaker.
+    """
+    if not capped or not isinstance(error, asyncio.TimeoutError):
+        return False
+    remaining = deadline_remaining()
+    return remaining is not None and remaining < 0.01
+
 
 class OllamaClient:
-    def __init__(self, base_url: str, model: str, embedding_model: str):
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        embedding_model: str,
+        max_concurrency: int = 1,
+        model_concurrency: dict[str, int] | None = None,
+        keep_alive: str = "30m",
+        agent_keep_alive: str = "10m",
+        backends: list[str] | None = None,
+        retries: int = 2,
+        retry_base_delay: float = 0.5,
+        breaker_threshold: int = 3,
+        breaker_reset_seconds: float = 30,
+        http=None,
+        cache: ResponseCache | None = None,
+    ):
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.embedding_model = embedding_model
         self._session: aiohttp.ClientSession | None = None
+        # Shared HttpClient; without one the client keeps a session of its own
+        self.http = http
+        # Requests are routed per model to the best of these Ollama servers
+        self.pool = BackendPool(backends or [self.base_url], breaker_threshold, breaker_reset_seconds)
+        self.retries = retries
+        self.retry_base_delay = retry_base_delay
+        # Orders requests per model and backend: interactive > agent > automation > background
+        self.scheduler = RequestScheduler(max_concurrency, model_concurrency)
+        # Main model stays loaded longer than agent and helper models
+        self.models = ModelResidency(self, keep_alive, agent_keep_alive)
+        # Answers of deterministic calls; None disables caching
+        self.cache = cache
+
+    def _cache_key(self, endpoint: str, payload: dict, cache: bool | None) -> str | None:
+        """Cache key for the payload, or None if the call must not be cached.
+
+        cache=None caches only deterministic calls (temperature 0); True and
+        False let the caller decide.
+        """
+        if self.cache is None:
+            return None
+        if cache is None:
+            cache = is_deterministic(payload.get("options"))
+        return cache_key(endpoint, payload) if cache else None
+
+    def _timeout(self, total: float) -> aiohttp.ClientTimeout:
+        if self.http is not None:
+            return self.http.timeout(total)
+        return aiohttp.ClientTimeout(total=total)
 
     async def _get_session(self) -> aiohttp.ClientSession:
+        if self.http is not None:
+            return await self.http.session()
         if self._session is None or self._session.closed:
             self._session = aiohttp.ClientSession()
         return self._session
 
+    @asynccontextmanager
+    async def _track_request(self, payload: dict):
+        """Set the payload's keep_alive and track residency of its model."""
+        model = payload["model"]
+        payload["keep_alive"] = self.models.keep_alive(model)
+        remaining = deadline_remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(f"Deadline passed before the request for '{model}' was queued")
+        self.models.note_request(model)
+        yield
+        self.models.touch(model)
+
+    @asynccontextmanager
+    async def _backend_slot(self, backend, model: str, priority: Priority | None):
+        """Hold one of the backend's slots for model, queued by priority.
+
+        Waiting counts against the caller's deadline.
+        """
+        async with AsyncExitStack() as stack:
+            backend.queued += 1
+            try:
+                await stack.enter_async_context(self.scheduler.slot(
+                    model, priority, deadline_remaining(), key=f"{model}@{backend.url}",
+                ))
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"Deadline passed while queued for '{model}'") from None
+            finally:
+                backend.queued -= 1
+            backend.in_flight += 1
+            backend.requests += 1
+            try:
+                yield
+            finally:
+                backend.in_flight -= 1
+
+    @asynccontextmanager
+    async def _post(self, path: str, payload: dict, timeout: float, priority: Priority | None = None):
+        """POST to the best backend for the payload's model and yield the response.
+
+        Each backend has its own priority queue per model, so its concurrency
+        limit holds and interactive requests are served before background
+        ones. The request queues at the best ranked backend (see
+        BackendPool.candidates). Connection errors, timeouts and 5xx answers
+        before the response starts fail over to the next backend; a 404
+        (model not installed there) does too, without counting as a
+        failure. When every backend failed, the round is retried up to
+        `retries` times with jittered backoff. Backends with an open circuit
+        breaker are skipped, so with all of them open the call fails at
+        once. The timeout of each attempt is capped by the caller's deadline.
+        """
+        session = await self._get_session()
+        model = payload["model"]
+        last_error: BaseException | None = None
+        attempt = 0
+        while True:
+            candidates = self.pool.candidates(model)
+            if not candidates:
+                raise LLMUnavailableError(
+                    f"All Ollama backends are unavailable (circuit open): {last_error or 'no backend'}"
+                )
+            only_missing = True
+            for backend in candidates:
+                async with self._backend_slot(backend, model, priority):
+                    if not backend.available():
+                        # Breaker opened while this request was queued
+                        only_missing = False
+                        continue
+                    remaining = deadline_remaining()
+                    if remaining is not None and remaining <= 0:
+                        raise DeadlineExceeded(f"Deadline passed before '{model}' answered") from last_error
+                    capped = remaining is not None and remaining < timeout
+                    attempt_timeout = remaining if capped else timeout
+                    try:
+                        resp = await session.post(
+                            f"{backend.url}{path}",
+                            json=payload,
+                            timeout=self._timeout(attempt_timeout),
+                        )
+                    except _BACKEND_ERRORS as e:
+                        if _hit_deadline(e, capped):
+                            raise DeadlineExceeded(f"Deadline passed before '{model}' answered") from e
+                        self.pool.mark_failure(backend, e)
+                        last_error = e
+                        only_missing = False
+                        continue
+                    if resp.status == 404 or resp.status >= 500:
+                        error = aiohttp.ClientResponseError(
+                            resp.request_info, resp.history, status=resp.status,
+                            message=(await resp.text())[:200],
+                        )
+                        resp.release()
+                        if resp.status == 404:
+                            if backend.models is not None:
+                                backend.models.discard(model)
+                        else:
+                            self.pool.mark_failure(backend, error)
+                            only_missing = False
+                        last_error = error
+                        continue
+
+                    try:
+                        yield resp
+                        self.pool.mark_success(backend, model)
+                    except _BACKEND_ERRORS as e:
+                        if _hit_deadline(e, capped):
+                            raise DeadlineExceeded(f"Deadline passed while '{model}' was answering") from e
+                        self.pool.mark_failure(backend, e)
+                        raise LLMUnavailableError(f"Ollama backend {backend.url} stopped answering: {e!r}") from e
+                    finally:
+                        resp.release()
+                    return
+
+            # Model not installed anywhere - retrying cannot help
+            if only_missing and last_error is not None:
+                raise last_error
+            attempt += 1
+            if attempt > self.retries:
+                raise LLMUnavailableError(
+                    f"Ollama request for '{model}' failed after {attempt} attempts: {last_error!r}"
+                ) from last_error
+            delay = backoff_delay(attempt, self.retry_base_delay)
+            remaining = deadline_remaining()
+            if remaining is not None and delay >= remaining:
+                raise DeadlineExceeded(f"Deadline passed while retrying '{model}'") from last_error
+            logger.info(f"Retrying Ollama request for '{model}' in {delay:.2f}s (attempt {attempt + 1})")
+            await asyncio.sleep(delay)
+
     async def close(self):
+        await self.models.close()
         if self._session and not self._session.closed:
             await self._session.close()
             self._session = None
@@ -29,6 +227,8 @@ class OllamaClient:
         tools: list[dict] | None = None,
         model: str | None = None,
         options: dict | None = None,
+        priority: Priority | None = None,
+        cache: bool | None = None,
     ) -> dict:
         payload: dict = {
             "model": model or self.model,
@@ -40,20 +240,24 @@ class OllamaClient:
         if options:
             payload["options"] = options
 
-        session = await self._get_session()
-        async with session.post(
-            f"{self.base_url}/api/chat",
-            json=payload,
-            timeout=aiohttp.ClientTimeout(total=300),
-        ) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            return data.get("message", {})
+        key = self._cache_key("/api/chat", payload, cache)
+        if key and (hit := await self.cache.get(key)) is not None:
+            return hit
+
+        async with self._track_request(payload):
+            async with self._post("/api/chat", payload, timeout=300, priority=priority) as resp:
+                resp.raise_for_status()
+                data = await resp.json()
+                message = data.get("message", {})
+        if key and (message.get("content") or message.get("tool_calls")):
+            await self.cache.put(key, message)
+        return message
 
     async def chat_stream(
         self,
         messages: list[dict],
         model: str | None = None,
+        priority: Priority | None = None,
     ) -> AsyncIterator[str]:
         """Stream chat responses token by token. Only for final responses (no tools)."""
         payload: dict = {
@@ -62,66 +266,161 @@ class OllamaClient:
             "stream": True,
         }
 
-        session = await self._get_session()
-        async with session.post(
-            f"{self.base_url}/api/chat",
-            json=payload,
-            timeout=aiohttp.ClientTimeout(total=120),
-        ) as resp:
-            resp.raise_for_status()
-            async for line in resp.content:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    data = json.loads(line)
-                    token = data.get("message", {}).get("content", "")
+        async with self._track_request(payload):
+            async with self._post("/api/chat", payload, timeout=120, priority=priority) as resp:
+                resp.raise_for_status()
+                async for line in resp.content:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                        token = data.get("message", {}).get("content", "")
+                        if token:
+                            yield token
+                        if data.get("done"):
+                            break
+                    except json.JSONDecodeError:
+                        continue
+
+    async def chat_stream_tools(
+        self,
+        messages: list[dict],
+        tools: list[dict] | None = None,
+        model: str | None = None,
+        options: dict | None = None,
+        priority: Priority | None = None,
+        cache: bool | None = None,
+    ) -> AsyncIterator[dict]:
+        """Stream a chat round that may call tools.
+
+        Yields {"token": str} for each content token as it arrives, then one
+        final {"message": dict} with the full content and any tool_calls
+        collected from the stream (same shape as chat() returns). A cached
+        answer is replayed as a single token.
+        """
+        payload: dict = {
+            "model": model or self.model,
+            "messages": messages,
+            "stream": True,
+        }
+        if tools:
+            payload["tools"] = tools
+        if options:
+            payload["options"] = options
+
+        key = self._cache_key("/api/chat", payload, cache)
+        if key and (hit := await self.cache.get(key)) is not None:
+            if hit.get("content"):
+                yield {"token": hit["content"]}
+            yield {"message": hit}
+            return
+
+        content_parts: list[str] = []
+        tool_calls: list[dict] = []
+        async with self._track_request(payload):
+            async with self._post("/api/chat", payload, timeout=300, priority=priority) as resp:
+                resp.raise_for_status()
+                async for line in resp.content:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    message = data.get("message", {})
+                    if message.get("tool_calls"):
+                        tool_calls.extend(message["tool_calls"])
+                    token = message.get("content", "")
                     if token:
-                        yield token
+                        content_parts.append(token)
+                        yield {"token": token}
                     if data.get("done"):
                         break
-                except json.JSONDecodeError:
-                    continue
 
-    async def generate(self, prompt: str, model: str | None = None) -> str:
+        result: dict = {"role": "assistant", "content": "".join(content_parts)}
+        if tool_calls:
+            result["tool_calls"] = tool_calls
+        if key and (content_parts or tool_calls):
+            await self.cache.put(key, result)
+        yield {"message": result}
+
+    async def generate(
+        self,
+        prompt: str,
+        model: str | None = None,
+        images: list[str] | None = None,
+        timeout: float = 120,
+        priority: Priority | None = None,
+        options: dict | None = None,
+        cache: bool | None = None,
+    ) -> str:
         payload = {
             "model": model or self.model,
             "prompt": prompt,
             "stream": False,
         }
-        session = await self._get_session()
-        async with session.post(
-            f"{self.base_url}/api/generate",
-            json=payload,
-            timeout=aiohttp.ClientTimeout(total=120),
-        ) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            return data.get("response", "")
-
-    async def embed(self, text: str) -> list[float]:
+        if images:
+            payload["images"] = images
+        if options:
+            payload["options"] = options
+
+        key = self._cache_key("/api/generate", payload, cache)
+        if key and (hit := await self.cache.get(key)) is not None:
+            return hit["response"]
+
+        async with self._track_request(payload):
+            async with self._post("/api/generate", payload, timeout=timeout, priority=priority) as resp:
+                resp.raise_for_status()
+                data = await resp.json()
+                text = data.get("response", "")
+        if key and text:
+            await self.cache.put(key, {"response": text})
+        return text
+
+    async def embed(self, text: str, priority: Priority | None = None) -> list[float]:
         payload = {
             "model": self.embedding_model,
             "input": text,
         }
-        session = await self._get_session()
-        async with session.post(
-            f"{self.base_url}/api/embed",
-            json=payload,
-            timeout=aiohttp.ClientTimeout(total=30),
-        ) as resp:
-            resp.raise_for_status()
-            data = await resp.json()
-            embeddings = data.get("embeddings", [[]])
-            return embeddings[0] if embeddings else []
+        async with self._track_request(payload):
+            async with self._post("/api/embed", payload, timeout=30, priority=priority) as resp:
+                resp.raise_for_status()
+                data = await resp.json()
+                embeddings = data.get("embeddings", [[]])
+                return embeddings[0] if embeddings else []
 
     async def is_available(self) -> bool:
-        try:
-            session = await self._get_session()
-            async with session.get(
-                f"{self.base_url}/api/tags",
-                timeout=aiohttp.ClientTimeout(total=5),
-            ) as resp:
-                return resp.status == 200
-        except Exception:
-            return False
+        """Probe all backends (inventory and loaded models). True if any is healthy."""
+        session = await self._get_session()
+        healthy = await self.pool.refresh(session)
+        self.models.sync()
+        return healthy > 0
+
+    async def list_models(self) -> list[dict]:
+        """Installed models across all healthy backends (from /api/tags, deduplicated by name)."""
+        session = await self._get_session()
+        models: dict[str, dict] = {}
+        for backend in self.pool.backends:
+            if not backend.available():
+                continue
+            try:
+                async with session.get(
+                    f"{backend.url}/api/tags",
+                    timeout=aiohttp.ClientTimeout(total=5),
+                ) as resp:
+                    resp.raise_for_status()
+                    data = await resp.json()
+            except Exception as e:
+                self.pool.mark_failure(backend, e)
+                continue
+            for m in data.get("models", []):
+                models.setdefault(m.get("name") or m.get("model"), m)
+        return list(models.values())
+
+    def backend_stats(self) -> list[dict]:
+        return self.pool.stats()
+
+    def cache_stats(self) -> dict | None:
+        return self.cache.stats() if self.cache else None
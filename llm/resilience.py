@@ -0,0 +1,85 @@
+import random
+import time
+from contextvars import ContextVar
+
+
+class LLMUnavailableError(Exception):
+    """No Ollama backend could answer (breakers open, retries exhausted or deadline passed)."""
+
+
+class DeadlineExceeded(LLMUnavailableError):
+    """The caller's deadline passed before the LLM call could finish."""
+
+
+# Absolute time.monotonic() by which LLM calls of the current task must finish
+current_deadline: ContextVar[float | None] = ContextVar("llm_deadline", default=None)
+
+
+def deadline_remaining() -> float | None:
+    """Seconds left until the current deadline, or None if there is none."""
+    deadline = current_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+async def run_with_deadline(seconds: float, awaitable):
+    """Await `awaitable` with all LLM calls inside it bounded by `seconds`.
+
+    Nested deadlines can only shorten an outer one. Calls that start after
+    the deadline fail with DeadlineExceeded; running calls get the remaining
+    time as their timeout.
+    """
+    deadline = time.monotonic() + seconds
+    outer = current_deadline.get()
+    token = current_deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        return await awaitable
+    finally:
+        current_deadline.reset(token)
+
+
+def backoff_delay(attempt: int, base: float, cap: float = 10.0) -> float:
+    """Exponential backoff with full jitter for retry `attempt` (1-based)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Stops sending requests to a backend after repeated failures.
+
+    closed: requests flow. After `failure_threshold` consecutive failures the
+    breaker opens and requests are refused for `reset_timeout` seconds. Then
+    it is half-open: requests are let through again, the first success
+    closes it and a failure reopens it for another period.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> bool:
+        """Count a failure. Returns True if this opened the breaker."""
+        self.failures += 1
+        was_open = self.opened_at is not None
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if not was_open:
+                self.trips += 1
+                return True
+        return False
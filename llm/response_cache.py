@@ -0,0 +1,105 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Payload fields that do not influence the model's answer
+_IGNORED_FIELDS = ("stream", "keep_alive")
+
+
+def cache_key(endpoint: str, payload: dict) -> str:
+    """Hash of endpoint, model, messages/prompt, options, images and tool schema."""
+    relevant = {k: v for k, v in payload.items() if k not in _IGNORED_FIELDS}
+    blob = json.dumps([endpoint, relevant], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(options: dict | None) -> bool:
+    return bool(options) and options.get("temperature") == 0
+
+
+class ResponseCache:
+    """LRU cache of LLM responses with a TTL, optionally persisted to SQLite.
+
+    Only used for calls that are deterministic (temperature 0) or whose
+    caller opts in. With a Database the entries also survive restarts;
+    the in-memory LRU is checked first.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600, db=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db = db
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def initialize(self):
+        if self.db:
+            await self.db.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            await self.db.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+
+    async def get(self, key: str) -> dict | None:
+        entry = self._entries.get(key)
+        if entry and time.time() - entry[0] < self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+        if entry:
+            del self._entries[key]
+
+        if self.db:
+            try:
+                row = await self.db.fetchone(
+                    "SELECT response, created_at FROM llm_cache WHERE key = ? AND created_at >= ?",
+                    (key, time.time() - self.ttl),
+                )
+            except Exception:
+                logger.debug("LLM cache lookup failed", exc_info=True)
+                row = None
+            if row:
+                value = json.loads(row["response"])
+                self._remember(key, value, row["created_at"])
+                self.hits += 1
+                return dict(value)
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, value: dict):
+        now = time.time()
+        self._remember(key, value, now)
+        if self.db:
+            try:
+                await self.db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, response, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now),
+                )
+            except Exception:
+                logger.debug("LLM cache write failed", exc_info=True)
+
+    def _remember(self, key: str, value: dict, created_at: float):
+        self._entries[key] = (created_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,142 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """LLM request priority classes (lower value is served first)."""
+    INTERACTIVE = 0
+    AGENT = 1
+    AUTOMATION = 2
+    BACKGROUND = 3
+
+
+# Priority of LLM calls made from the current task; inherited by tasks it creates
+current_priority: ContextVar[Priority] = ContextVar("llm_priority", default=Priority.INTERACTIVE)
+
+
+async def run_with_priority(priority: Priority, awaitable):
+    """Await `awaitable` with all LLM calls inside it scheduled at `priority`."""
+    token = current_priority.set(priority)
+    try:
+        return await awaitable
+    finally:
+        current_priority.reset(token)
+
+
+class _ModelQueue:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters: list[tuple[int, int, asyncio.Future]] = []
+
+
+class RequestScheduler:
+    """Per-model concurrency limiter that admits waiting requests by priority.
+
+    A request that finds its model at the concurrency limit waits in a
+    priority queue (FIFO within a class) until a running request finishes.
+    Queue-wait times are recorded per priority class.
+    """
+
+    def __init__(self, default_limit: int = 1, model_limits: dict[str, int] | None = None):
+        self.default_limit = max(default_limit, 1)
+        self.model_limits = model_limits or {}
+        self._queues: dict[str, _ModelQueue] = {}
+        self._seq = itertools.count()
+        self._stats = {
+            p.name.lower(): {"requests": 0, "waited": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for p in Priority
+        }
+
+    def _queue(self, model: str, key: str | None = None) -> _ModelQueue:
+        key = key or model
+        q = self._queues.get(key)
+        if q is None:
+            q = _ModelQueue(max(self.model_limits.get(model, self.default_limit), 1))
+            self._queues[key] = q
+        return q
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        model: str,
+        priority: Priority | None = None,
+        timeout: float | None = None,
+        key: str | None = None,
+    ):
+        """Hold one of the model's concurrency slots for the duration of the block.
+
+        `key` gives the model a separate queue with the same limit (one per
+        backend). Raises asyncio.TimeoutError if no slot was granted within
+        `timeout` seconds.
+        """
+        priority = current_priority.get() if priority is None else priority
+        q = self._queue(model, key)
+        t0 = time.perf_counter()
+        if q.in_flight < q.limit and not q.waiters:
+            q.in_flight += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(q.waiters, (int(priority), next(self._seq), future))
+            try:
+                # On timeout wait_for cancels the future; release() skips it
+                await asyncio.wait_for(future, timeout)
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Slot was granted just as we were cancelled - pass it on
+                    self._release(q)
+                raise
+        self._record(priority, time.perf_counter() - t0)
+        try:
+            yield
+        finally:
+            self._release(q)
+
+    def _release(self, q: _ModelQueue):
+        while q.waiters:
+            _, _, future = heapq.heappop(q.waiters)
+            if not future.done():
+                # Hand the slot over directly; in_flight stays the same
+                future.set_result(None)
+                return
+        q.in_flight -= 1
+
+    def _record(self, priority: Priority, wait: float):
+        s = self._stats[priority.name.lower()]
+        s["requests"] += 1
+        if wait > 0.001:
+            s["waited"] += 1
+        s["total_wait"] += wait
+        s["max_wait"] = max(s["max_wait"], wait)
+        if wait > 1:
+            logger.info(f"LLM request ({priority.name.lower()}) waited {wait:.1f}s for a slot")
+
+    def stats(self) -> dict:
+        """Queue depth per model and wait-time metrics per priority class."""
+        return {
+            "models": {
+                model: {
+                    "limit": q.limit,
+                    "in_flight": q.in_flight,
+                    "queued": sum(1 for _, _, f in q.waiters if not f.done()),
+                }
+                for model, q in self._queues.items()
+            },
+            "priorities": {
+                name: {
+                    "requests": s["requests"],
+                    "waited": s["waited"],
+                    "avg_wait": round(s["total_wait"] / s["requests"], 3) if s["requests"] else 0.0,
+                    "max_wait": round(s["max_wait"], 3),
+                }
+                for name, s in self._stats.items()
+            },
+        }
@@ -44,6 +44,8 @@ sys.excepthook = _handle_unhandled_exception
 _setup_logging()
 
 from llm.ollama_client import OllamaClient
+from llm.response_cache import ResponseCache
+from llm.scheduler import Priority, run_with_priority
 from memory.database import Database
 from skills.skill_registry import SkillRegistry
 from skills.web_browse import WebBrowseSkill
@@ -63,6 +65,8 @@ from skills.pdf_reader import PDFReaderSkill
 from skills.calculator import CalculatorSkill
 from skills.calendar_manager import CalendarManagerSkill
 from memory.project_store import ProjectStore
+from memory.summarizer import ConversationSummarizer
+from memory.fact_extractor import FactExtractionQueue
 from scheduler.engine import SchedulerEngine
 from scheduler.heartbeat import Heartbeat
 from agents.agent_router import AgentRouter
@@ -75,16 +79,65 @@ from automation.automation_engine import AutomationEngine
 from webhook.manager import WebhookManager
 from webhook.routes import webhook_router, init_webhook_routes
 from notifications.notification_service import NotificationService
+from services.dashboard_feed import DashboardFeed
+from services.http_client import HttpClient
+from services.storage_accountant import StorageAccountant
+from services.storage_gc import RetentionPolicy, StorageGC
 from scripts.script_engine import ScriptEngine
 
 
-db = Database(Config.DB_PATH)
+db = Database(
+    Config.DB_PATH,
+    index_path=Config.MEMORY_INDEX_PATH,
+    write_behind=Config.DB_WRITE_BEHIND,
+    write_batch_ms=Config.DB_WRITE_BATCH_MS,
+    write_batch_size=Config.DB_WRITE_BATCH_SIZE,
+    read_pool_size=Config.DB_READ_POOL_SIZE,
+    history_cache_sessions=Config.HISTORY_CACHE_SESSIONS,
+    history_cache_messages=Config.HISTORY_CACHE_MESSAGES,
+)
+http_client = HttpClient(
+    limit=Config.HTTP_POOL_LIMIT,
+    limit_per_host=Config.HTTP_LIMIT_PER_HOST,
+    keepalive_timeout=Config.HTTP_KEEPALIVE_SECONDS,
+    dns_cache_ttl=Config.HTTP_DNS_CACHE_TTL,
+    connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+)
+llm_cache = ResponseCache(
+    max_entries=Config.LLM_CACHE_SIZE,
+    ttl=Config.LLM_CACHE_TTL,
+    db=db if Config.LLM_CACHE_PERSIST else None,
+) if Config.LLM_CACHE_ENABLED else None
 ollama = OllamaClient(
     base_url=Config.OLLAMA_BASE_URL,
     model=Config.OLLAMA_MODEL,
     embedding_model=Config.OLLAMA_EMBEDDING_MODEL,
+    max_concurrency=Config.OLLAMA_MAX_CONCURRENCY,
+    model_concurrency=Config.OLLAMA_MODEL_CONCURRENCY,
+    keep_alive=Config.OLLAMA_KEEP_ALIVE,
+    agent_keep_alive=Config.AGENT_KEEP_ALIVE,
+    backends=Config.OLLAMA_BACKENDS,
+    retries=Config.OLLAMA_RETRIES,
+    retry_base_delay=Config.OLLAMA_RETRY_BASE_DELAY,
+    breaker_threshold=Config.OLLAMA_BREAKER_THRESHOLD,
+    breaker_reset_seconds=Config.OLLAMA_BREAKER_RESET_SECONDS,
+    http=http_client,
+    cache=llm_cache,
 )
+db.embedder = ollama.embed
 event_bus = EventBus()
+storage = StorageAccountant(
+    {
+        "images": Config.GENERATED_IMAGES_DIR,
+        "audio": Config.GENERATED_AUDIO_DIR,
+        "uploads": Config.UPLOAD_DIR,
+        "data": Config.DB_PATH.parent,
+    },
+    interval=Config.STORAGE_RECONCILE_MINUTES * 60,
+)
+dashboard_feed = DashboardFeed(refresh_interval=Config.DASHBOARD_REFRESH_SECONDS)
+event_bus.subscribe_all(dashboard_feed.on_event)
+ollama.pool.on_health_change = lambda: dashboard_feed.notify("status")
 notification_service = NotificationService()
 scheduler_engine = SchedulerEngine(db=db, event_bus=event_bus)
 _sd_process = None
@@ -92,12 +145,12 @@ _sd_process = None
 
 async def _is_sd_running() -> bool:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{Config.SD_API_URL}/sdapi/v1/sd-models",
-                timeout=aiohttp.ClientTimeout(total=3),
-            ) as resp:
-                return resp.status == 200
+        session = await http_client.session()
+        async with session.get(
+            f"{Config.SD_API_URL}/sdapi/v1/sd-models",
+            timeout=aiohttp.ClientTimeout(total=3),
+        ) as resp:
+            return resp.status == 200
     except Exception:
         return False
 
@@ -138,18 +191,8 @@ async def _start_stable_diffusion():
 
 async def _check_agent_models(agent_router):
     """Log which agent models are available and warn about missing ones."""
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(
-                f"{Config.OLLAMA_BASE_URL}/api/tags",
-                timeout=aiohttp.ClientTimeout(total=5),
-            ) as resp:
-                if resp.status != 200:
-                    logging.warning("Could not check available models")
-                    return
-                data = await resp.json()
-                installed = {m["name"] for m in data.get("models", [])}
-    except Exception:
+    installed = {m["name"] for m in await agent_router.ollama.list_models()}
+    if not installed:
         logging.warning("Could not connect to Ollama to check agent models")
         return
 
@@ -165,6 +208,14 @@ async def _check_agent_models(agent_router):
                 f"Run: ollama pull {model}"
             )
 
+    resident = await agent_router.ollama.models.refresh()
+    logging.info(f"Models loaded in Ollama: {', '.join(resident) or 'none'}")
+    for backend in agent_router.ollama.backend_stats():
+        logging.info(
+            f"Ollama backend {backend['url']}: {'healthy' if backend['healthy'] else 'DOWN'}, "
+            f"{backend['models'] or 0} models"
+        )
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -173,6 +224,12 @@ async def lifespan(app: FastAPI):
     Config.LOG_DIR.mkdir(parents=True, exist_ok=True)
 
     await db.initialize()
+    if llm_cache:
+        await llm_cache.initialize()
+    # Embed memories that were stored before embeddings existed (or while Ollama was down)
+    backfill_task = asyncio.create_task(
+        run_with_priority(Priority.BACKGROUND, db.backfill_embeddings())
+    )
 
     # Start Stable Diffusion in background (only if SD_ENABLED=true in .env)
     sd_task = asyncio.create_task(_start_stable_diffusion()) if Config.SD_ENABLED else None
@@ -186,23 +243,28 @@ async def lifespan(app: FastAPI):
     init_webhook_routes(webhook_manager)
 
     # Register core skills
-    skills = SkillRegistry()
+    skills = SkillRegistry(max_concurrency=Config.TOOL_MAX_CONCURRENCY, timeout=Config.TOOL_TIMEOUT)
     skills.register(WebBrowseSkill())
     skills.register(FileManagerSkill(Config.ALLOWED_DIRECTORIES))
     skills.register(TaskSchedulerSkill(scheduler_engine))
     skills.register(SystemCommandSkill())
-    skills.register(WebFetchSkill())
+    skills.register(WebFetchSkill(http=http_client))
     project_store = ProjectStore(db)
+    project_store.on_change = lambda: dashboard_feed.notify("stats")
     skills.register(ProjectManagerSkill(project_store))
     Config.GENERATED_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
     Config.GENERATED_AUDIO_DIR.mkdir(parents=True, exist_ok=True)
     Config.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    storage.start()
     if Config.SD_ENABLED:
-        skills.register(ImageGenerationSkill(Config.SD_API_URL, Config.GENERATED_IMAGES_DIR))
+        skills.register(ImageGenerationSkill(
+            Config.SD_API_URL, Config.GENERATED_IMAGES_DIR, ollama=ollama, http=http_client,
+            storage=storage,
+        ))
     skills.register(MemoryManagerSkill(db))
 
     # Register Phase 12 skills
-    skills.register(ScreenshotSkill(Config.GENERATED_IMAGES_DIR))
+    skills.register(ScreenshotSkill(Config.GENERATED_IMAGES_DIR, storage=storage))
     skills.register(ClipboardSkill())
     skills.register(PDFReaderSkill())
     skills.register(CalculatorSkill())
@@ -229,8 +291,25 @@ async def lifespan(app: FastAPI):
 
     agent_router = AgentRouter(ollama, skills)
 
+    summarizer = (
+        ConversationSummarizer(
+            ollama, db, keep_recent=Config.SUMMARY_KEEP_RECENT, batch=Config.SUMMARY_BATCH
+        )
+        if Config.SUMMARY_ENABLED else None
+    )
+
+    fact_queue = FactExtractionQueue(
+        ollama, db,
+        debounce_seconds=Config.FACT_EXTRACTION_DEBOUNCE_SECONDS,
+        max_turns=Config.FACT_EXTRACTION_MAX_TURNS,
+    )
+    fact_queue.start()
+
     # Create the shared chat engine
-    chat_engine = ChatEngine(ollama, db, skills, agent_router, SYSTEM_PROMPT)
+    chat_engine = ChatEngine(
+        ollama, db, skills, agent_router, SYSTEM_PROMPT,
+        summarizer=summarizer, fact_queue=fact_queue, storage=storage,
+    )
     notification_service.set_chat_engine(chat_engine)
     init_routes(
         chat_engine,
@@ -240,10 +319,34 @@ async def lifespan(app: FastAPI):
         scheduler_engine=scheduler_engine,
         sd_check_fn=_is_sd_running if Config.SD_ENABLED else None,
         project_store=project_store,
+        dashboard_feed=dashboard_feed,
+        storage=storage,
     )
+    scheduler_engine.on_change = lambda: dashboard_feed.notify("overview")
 
     # Start scheduler
     await scheduler_engine.start()
+    if Config.STORAGE_GC_ENABLED:
+        storage_gc = StorageGC(
+            db,
+            [
+                RetentionPolicy("images", Config.GENERATED_IMAGES_DIR,
+                                Config.GC_IMAGES_MAX_AGE_DAYS, Config.GC_IMAGES_MAX_MB * 1_048_576,
+                                url_prefix="/generated/"),
+                RetentionPolicy("audio", Config.GENERATED_AUDIO_DIR,
+                                Config.GC_AUDIO_MAX_AGE_DAYS, Config.GC_AUDIO_MAX_MB * 1_048_576,
+                                url_prefix="/generated/audio/"),
+                RetentionPolicy("uploads", Config.UPLOAD_DIR,
+                                Config.GC_UPLOADS_MAX_AGE_DAYS, Config.GC_UPLOADS_MAX_MB * 1_048_576,
+                                url_prefix="/uploads/"),
+            ],
+            storage=storage,
+            event_bus=event_bus,
+        )
+        try:
+            scheduler_engine.add_internal_job("storage_gc", Config.STORAGE_GC_CRON, storage_gc.run)
+        except ValueError as e:
+            logging.error(f"Storage GC not scheduled: {e}")
     heartbeat = Heartbeat(
         scheduler_engine,
         event_bus=event_bus,
@@ -254,6 +357,9 @@ async def lifespan(app: FastAPI):
 
     # Check agent model availability
     await _check_agent_models(agent_router)
+    if Config.MODEL_PRELOAD:
+        # First chat should not pay the main model's load time
+        ollama.models.warm(Config.OLLAMA_MODEL)
 
     # Optionally start Discord bot
     discord_bot = None
@@ -281,13 +387,20 @@ async def lifespan(app: FastAPI):
     if discord_bot:
         await discord_bot.close()
     await heartbeat.stop()
+    backfill_task.cancel()
     if sd_task:
         sd_task.cancel()
     if _sd_process and _sd_process.poll() is None:
         logging.info("Stopping Stable Diffusion...")
         _sd_process.terminate()
     await scheduler_engine.stop()
+    await fact_queue.close()
+    await dashboard_feed.close()
+    await storage.close()
+    if summarizer:
+        await summarizer.close()
     await ollama.close()
+    await http_client.close()
     await db.close()
 
 
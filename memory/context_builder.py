@@ -14,31 +14,50 @@ _CATEGORY_LABELS = {
 }
 
 
-async def build_memory_context(db, limit: int = 30) -> str:
-    """Build a memory context string for injection into the system prompt.
+# Always-present memories; kept in the system prompt in insertion order so the
+# prompt prefix only changes when one of them is added or edited
+CORE_CATEGORIES = ("persoenlich", "wichtig", "vorlieben")
 
-    Returns an empty string if no memories exist.
+
+def _format_memory(m: dict) -> str:
+    label = _CATEGORY_LABELS.get(m["category"], m["category"].capitalize())
+    return f"- [{label}] {m['key']}: {m['value']}"
+
+
+async def build_core_memory_context(db, limit: int = 30) -> tuple[str, set[int]]:
+    """Build the stable memory block for the system prompt.
+
+    Returns (text, ids of the included memories). The text is byte-identical
+    between turns as long as no core memory changes.
     """
-    memories = await db.get_recent_memories(limit=limit)
+    memories = await db.get_core_memories(CORE_CATEGORIES, limit=limit)
     if not memories:
-        return ""
-
-    # Group by category, preserving recency order within each group
-    grouped: dict[str, list[dict]] = {}
-    for m in memories:
-        cat = m["category"]
-        grouped.setdefault(cat, []).append(m)
+        return "", set()
 
     lines = ["", "Dein Gedaechtnis (was du ueber Marlon weisst):"]
-    for cat, entries in grouped.items():
-        label = _CATEGORY_LABELS.get(cat, cat.capitalize())
-        for e in entries:
-            lines.append(f"- [{label}] {e['key']}: {e['value']}")
-
+    lines.extend(_format_memory(m) for m in memories)
     lines.append("")
     lines.append(
         "Nutze dieses Wissen aktiv in Gespraechen. "
         "Speichere neue Fakten mit dem memory_manager Tool."
     )
+    return "\n".join(lines), {m["id"] for m in memories}
+
+
+async def build_relevant_memory_context(
+    db, query: str, limit: int = 10, exclude: set[int] | None = None
+) -> str:
+    """Build the per-message memory block (memories most similar to the query).
 
-    return "\n".join(lines)
+    It changes every turn, so it belongs at the end of the prompt. Memories
+    already in the core block are skipped. Returns an empty string if none remain.
+    """
+    exclude = exclude or set()
+    memories = await db.get_relevant_memories(query, limit=limit + len(exclude))
+    memories = [m for m in memories if m.get("id") not in exclude][:limit]
+    if not memories:
+        return ""
+    memories.sort(key=lambda m: (m["category"], m.get("id", 0)))
+    lines = ["[Passende Erinnerungen aus deinem Gedaechtnis - nicht vom Nutzer geschrieben:"]
+    lines.extend(_format_memory(m) for m in memories)
+    return "\n".join(lines) + "]"
@@ -1,16 +1,69 @@
+import asyncio
 import json
 import logging
+import re
 import aiosqlite
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
+from typing import Awaitable, Callable
+
+from memory.embeddings import memory_text, encode_embedding, decode_embedding, normalize_query
+from memory.vector_index import VectorIndex
+from memory.history_cache import HistoryCache
 
 logger = logging.getLogger(__name__)
 
+_FTS_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts_query(query: str) -> str | None:
+    """Turn free text into a safe FTS5 MATCH expression (prefix match on every word)."""
+    tokens = _FTS_TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+@dataclass
+class WriteResult:
+    """Outcome of a statement committed by the write-behind writer."""
+    lastrowid: int | None
+    rowcount: int
+
 
 class Database:
-    def __init__(self, db_path: Path):
+    def __init__(
+        self,
+        db_path: Path,
+        index_path: Path | None = None,
+        write_behind: bool = False,
+        write_batch_ms: int = 5,
+        write_batch_size: int = 100,
+        read_pool_size: int = 0,
+        history_cache_sessions: int = 256,
+        history_cache_messages: int = 50,
+    ):
         self.db_path = db_path
+        # self.db is the only writer; reads may go through a pool of read-only connections
         self.db: aiosqlite.Connection | None = None
+        self.read_pool_size = read_pool_size
+        self._readers: list[aiosqlite.Connection] = []
+        self._read_pool: asyncio.Queue | None = None
+        # Recent messages of active sessions, so get_history only hits SQLite on a cold session
+        self.history_cache = HistoryCache(history_cache_sessions, history_cache_messages)
+        # Write-behind mode: a single writer task group-commits queued statements
+        self.write_behind = write_behind
+        self._write_batch_delay = write_batch_ms / 1000
+        self._write_batch_size = write_batch_size
+        self._write_queue: asyncio.Queue | None = None
+        self._writer_task: asyncio.Task | None = None
+        # Optional async text -> vector function (e.g. OllamaClient.embed)
+        self.embedder: Callable[[str], Awaitable[list[float]]] | None = None
+        # In-memory vector index over memory.embedding, snapshotted to index_path on close
+        self.index_path = index_path
+        self.vector_index = VectorIndex()
 
     async def initialize(self):
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -21,7 +74,52 @@ class Database:
         await self.db.commit()
         await self._create_tables()
         await self._create_indexes()
-        logger.info(f"Database initialized at {self.db_path}")
+        await self._create_fts()
+        await self._create_aggregates()
+        await self._load_vector_index()
+        await self._open_read_pool()
+        if self.write_behind:
+            self._write_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        logger.info(
+            f"Database initialized at {self.db_path}"
+            + (" (write-behind)" if self.write_behind else "")
+            + (f" ({len(self._readers)} readers)" if self._readers else "")
+        )
+
+    async def _open_read_pool(self):
+        """Open read-only connections so reads don't queue behind the writer (WAL allows both)."""
+        if self.read_pool_size <= 0:
+            return
+        self._read_pool = asyncio.Queue()
+        for _ in range(self.read_pool_size):
+            conn = await aiosqlite.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+            conn.row_factory = aiosqlite.Row
+            await conn.execute("PRAGMA query_only=ON")
+            self._readers.append(conn)
+            self._read_pool.put_nowait(conn)
+
+    @asynccontextmanager
+    async def _reader(self):
+        """Borrow a read-only connection, or the writer connection if there is no pool."""
+        if self._read_pool is None:
+            yield self.db
+            return
+        conn = await self._read_pool.get()
+        try:
+            yield conn
+        finally:
+            self._read_pool.put_nowait(conn)
+
+    async def _read_all(self, sql: str, params: tuple = ()) -> list:
+        async with self._reader() as conn:
+            cursor = await conn.execute(sql, params)
+            return await cursor.fetchall()
+
+    async def _read_one(self, sql: str, params: tuple = ()):
+        async with self._reader() as conn:
+            cursor = await conn.execute(sql, params)
+            return await cursor.fetchone()
 
     async def _create_tables(self):
         await self.db.executescript("""
@@ -39,6 +137,7 @@ class Database:
                 key TEXT NOT NULL,
                 value TEXT NOT NULL,
                 timestamp TEXT NOT NULL DEFAULT (datetime('now')),
+                embedding BLOB,
                 UNIQUE(category, key)
             );
 
@@ -63,8 +162,32 @@ class Database:
                 created_at TEXT NOT NULL DEFAULT (datetime('now')),
                 FOREIGN KEY (project_id) REFERENCES projects(id)
             );
+
+            CREATE TABLE IF NOT EXISTS conversation_summaries (
+                session_id TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                last_message_id INTEGER NOT NULL,
+                updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+            );
+
+            CREATE TABLE IF NOT EXISTS file_references (
+                path TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                created_at TEXT NOT NULL DEFAULT (datetime('now')),
+                PRIMARY KEY (path, session_id)
+            );
         """)
         await self.db.commit()
+        await self._migrate_columns()
+
+    async def _migrate_columns(self):
+        """Add columns introduced after the initial schema to existing databases."""
+        cursor = await self.db.execute("PRAGMA table_info(memory)")
+        columns = {row["name"] for row in await cursor.fetchall()}
+        if "embedding" not in columns:
+            await self.db.execute("ALTER TABLE memory ADD COLUMN embedding BLOB")
+            await self.db.commit()
+            logger.info("Database migrated: added memory.embedding column")
 
     async def _create_indexes(self):
         await self.db.executescript("""
@@ -83,109 +206,628 @@ class Database:
         """)
         await self.db.commit()
 
+    async def _create_fts(self):
+        """Create FTS5 indexes over memory and conversations, kept in sync by triggers."""
+        cursor = await self.db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('memory_fts', 'conversations_fts')"
+        )
+        existing = {r["name"] for r in await cursor.fetchall()}
+
+        await self.db.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5(
+                category, key, value,
+                content='memory', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS memory_fts_insert AFTER INSERT ON memory BEGIN
+                INSERT INTO memory_fts(rowid, category, key, value)
+                    VALUES (new.id, new.category, new.key, new.value);
+            END;
+            CREATE TRIGGER IF NOT EXISTS memory_fts_delete AFTER DELETE ON memory BEGIN
+                INSERT INTO memory_fts(memory_fts, rowid, category, key, value)
+                    VALUES ('delete', old.id, old.category, old.key, old.value);
+            END;
+            CREATE TRIGGER IF NOT EXISTS memory_fts_update AFTER UPDATE OF category, key, value ON memory BEGIN
+                INSERT INTO memory_fts(memory_fts, rowid, category, key, value)
+                    VALUES ('delete', old.id, old.category, old.key, old.value);
+                INSERT INTO memory_fts(rowid, category, key, value)
+                    VALUES (new.id, new.category, new.key, new.value);
+            END;
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+                content,
+                content='conversations', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS conversations_fts_insert AFTER INSERT ON conversations BEGIN
+                INSERT INTO conversations_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS conversations_fts_delete AFTER DELETE ON conversations BEGIN
+                INSERT INTO conversations_fts(conversations_fts, rowid, content)
+                    VALUES ('delete', old.id, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS conversations_fts_update AFTER UPDATE OF content ON conversations BEGIN
+                INSERT INTO conversations_fts(conversations_fts, rowid, content)
+                    VALUES ('delete', old.id, old.content);
+                INSERT INTO conversations_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+        """)
+
+        # Index rows that existed before the FTS tables were created
+        for table in ("memory_fts", "conversations_fts"):
+            if table not in existing:
+                await self.db.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+                logger.info(f"Built full-text index {table}")
+        await self.db.commit()
+
+    async def _create_aggregates(self):
+        """Create dashboard counters, kept up to date by triggers on every insert/delete.
+
+        stats_counters holds 'sessions', 'memory:<category>', 'project:<status>'
+        and 'task:<status>'; conversation_sessions counts messages per session
+        so the number of distinct sessions needs no scan.
+        """
+        cursor = await self.db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'stats_counters'"
+        )
+        existed = await cursor.fetchone() is not None
+
+        await self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS stats_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS conversation_sessions (
+                session_id TEXT PRIMARY KEY,
+                messages INTEGER NOT NULL
+            );
+
+            CREATE TRIGGER IF NOT EXISTS conversations_count_insert AFTER INSERT ON conversations BEGIN
+                INSERT OR IGNORE INTO conversation_sessions (session_id, messages) VALUES (new.session_id, 0);
+                UPDATE conversation_sessions SET messages = messages + 1 WHERE session_id = new.session_id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS conversations_count_delete AFTER DELETE ON conversations BEGIN
+                UPDATE conversation_sessions SET messages = messages - 1 WHERE session_id = old.session_id;
+                DELETE FROM conversation_sessions WHERE session_id = old.session_id AND messages <= 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS sessions_count_insert AFTER INSERT ON conversation_sessions BEGIN
+                INSERT OR IGNORE INTO stats_counters (name, value) VALUES ('sessions', 0);
+                UPDATE stats_counters SET value = value + 1 WHERE name = 'sessions';
+            END;
+            CREATE TRIGGER IF NOT EXISTS sessions_count_delete AFTER DELETE ON conversation_sessions BEGIN
+                UPDATE stats_counters SET value = value - 1 WHERE name = 'sessions';
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS memory_count_insert AFTER INSERT ON memory BEGIN
+                INSERT OR IGNORE INTO stats_counters (name, value) VALUES ('memory:' || new.category, 0);
+                UPDATE stats_counters SET value = value + 1 WHERE name = 'memory:' || new.category;
+            END;
+            CREATE TRIGGER IF NOT EXISTS memory_count_delete AFTER DELETE ON memory BEGIN
+                UPDATE stats_counters SET value = value - 1 WHERE name = 'memory:' || old.category;
+            END;
+            CREATE TRIGGER IF NOT EXISTS memory_count_update AFTER UPDATE OF category ON memory
+            WHEN old.category IS NOT new.category BEGIN
+                UPDATE stats_counters SET value = value - 1 WHERE name = 'memory:' || old.category;
+                INSERT OR IGNORE INTO stats_counters (name, value) VALUES ('memory:' || new.category, 0);
+                UPDATE stats_counters SET value = value + 1 WHERE name = 'memory:' || new.category;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS projects_count_insert AFTER INSERT ON projects BEGIN
+                INSERT OR IGNORE INTO stats_counters (name, value) VALUES ('project:' || new.status, 0);
+                UPDATE stats_counters SET value = value + 1 WHERE name = 'project:' || new.status;
+            END;
+            CREATE TRIGGER IF NOT EXISTS projects_count_delete AFTER DELETE ON projects BEGIN
+                UPDATE stats_counters SET value = value - 1 WHERE name = 'project:' || old.status;
+            END;
+            CREATE TRIGGER IF NOT EXISTS projects_count_update AFTER UPDATE OF status ON projects
+            WHEN old.status IS NOT new.status BEGIN
+                UPDATE stats_counters SET value = value - 1 WHERE name = 'project:' || old.status;
+                INSERT OR IGNORE INTO stats_counters (name, value) VALUES ('project:' || new.status, 0);
+                UPDATE stats_counters SET value = value + 1 WHERE name = 'project:' || new.status;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS tasks_count_insert AFTER INSERT ON tasks BEGIN
+                INSERT OR IGNORE INTO stats_counters (name, value) VALUES ('task:' || new.status, 0);
+                UPDATE stats_counters SET value = value + 1 WHERE name = 'task:' || new.status;
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_count_delete AFTER DELETE ON tasks BEGIN
+                UPDATE stats_counters SET value = value - 1 WHERE name = 'task:' || old.status;
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_count_update AFTER UPDATE OF status ON tasks
+            WHEN old.status IS NOT new.status BEGIN
+                UPDATE stats_counters SET value = value - 1 WHERE name = 'task:' || old.status;
+                INSERT OR IGNORE INTO stats_counters (name, value) VALUES ('task:' || new.status, 0);
+                UPDATE stats_counters SET value = value + 1 WHERE name = 'task:' || new.status;
+            END;
+        """)
+        await self.db.commit()
+
+        # Count rows that existed before the counters were created
+        if not existed:
+            await self.rebuild_aggregates()
+
+    async def rebuild_aggregates(self):
+        """Recount all dashboard counters from the base tables (one full scan)."""
+        await self.flush()
+        await self.db.executescript("""
+            DELETE FROM conversation_sessions;
+            DELETE FROM stats_counters;
+            INSERT INTO conversation_sessions (session_id, messages)
+                SELECT session_id, COUNT(*) FROM conversations GROUP BY session_id;
+            INSERT INTO stats_counters (name, value)
+                SELECT 'memory:' || category, COUNT(*) FROM memory GROUP BY category;
+            INSERT INTO stats_counters (name, value)
+                SELECT 'project:' || status, COUNT(*) FROM projects GROUP BY status;
+            INSERT INTO stats_counters (name, value)
+                SELECT 'task:' || status, COUNT(*) FROM tasks GROUP BY status;
+        """)
+        await self.db.commit()
+        logger.info("Rebuilt dashboard counters")
+
+    async def _index_signature(self) -> str:
+        cursor = await self.db.execute(
+            "SELECT id, timestamp FROM memory WHERE embedding IS NOT NULL"
+        )
+        return VectorIndex.signature([(r["id"], r["timestamp"]) for r in await cursor.fetchall()])
+
+    async def _load_vector_index(self):
+        """Load the memory vector index from its snapshot, or rebuild it from the blobs."""
+        signature = await self._index_signature()
+        if self.index_path and self.vector_index.load(self.index_path, signature):
+            logger.info(f"Vector index loaded from {self.index_path} ({len(self.vector_index)} vectors)")
+            return
+        cursor = await self.db.execute(
+            "SELECT id, embedding FROM memory WHERE embedding IS NOT NULL"
+        )
+        rows = await cursor.fetchall()
+        self.vector_index.build([(r["id"], decode_embedding(r["embedding"])) for r in rows])
+        logger.info(f"Vector index built from database ({len(self.vector_index)} vectors)")
+
+    async def save_vector_index(self):
+        if not self.index_path:
+            return
+        try:
+            self.vector_index.save(self.index_path, await self._index_signature())
+        except Exception:
+            logger.warning("Failed to save vector index snapshot", exc_info=True)
+
+    # --- Writes ---
+
+    async def _execute_and_commit(self, sql: str, params: tuple):
+        cursor = await self.db.execute(sql, params)
+        await self.db.commit()
+        return cursor
+
+    def submit_write(self, sql: str, params: tuple = ()) -> asyncio.Future:
+        """Schedule a write and return a future that resolves once it is committed.
+
+        In write-behind mode the statement joins the next group commit and the
+        future resolves to a WriteResult; otherwise it is committed on its own
+        and the future resolves to the cursor.
+        """
+        if self._write_queue is None:
+            return asyncio.ensure_future(self._execute_and_commit(sql, params))
+        future = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait((sql, params, future))
+        return future
+
+    async def _write(self, sql: str, params: tuple = (), on_commit=None):
+        # Shield so a cancelled caller does not cancel a write that is already queued.
+        # on_commit(result) runs inside the shield, so caches follow every commit.
+        async def write():
+            result = await self.submit_write(sql, params)
+            if on_commit:
+                on_commit(result)
+            return result
+
+        return await asyncio.shield(write())
+
+    async def _writer_loop(self):
+        """Collect queued writes for up to write_batch_ms / write_batch_size and commit them together."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._write_queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self._write_batch_delay
+            while len(batch) < self._write_batch_size:
+                try:
+                    if self._write_queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        item = await asyncio.wait_for(self._write_queue.get(), timeout)
+                    else:
+                        item = self._write_queue.get_nowait()
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                await self._commit_batch(batch)
+            except Exception:
+                logger.exception("Write-behind batch failed")
+
+    async def _commit_batch(self, batch: list[tuple]):
+        results = []
+        for sql, params, _ in batch:
+            try:
+                cursor = await self.db.execute(sql, params)
+                results.append(WriteResult(cursor.lastrowid, cursor.rowcount))
+            except Exception as e:
+                results.append(e)
+        try:
+            await self.db.commit()
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def flush(self):
+        """Wait until every write queued so far has been committed."""
+        if self._write_queue is not None:
+            await self._write("SELECT 1")
+
     async def close(self):
+        if self._writer_task:
+            self._write_queue.put_nowait(None)
+            await self._writer_task
+            self._writer_task = None
+            self._write_queue = None
+        for conn in self._readers:
+            await conn.close()
+        self._readers = []
+        self._read_pool = None
         if self.db:
+            await self.save_vector_index()
             await self.db.close()
             logger.info("Database connection closed")
 
     # --- Conversation methods ---
 
-    async def save_message(self, session_id: str, role: str, content: str):
-        await self.db.execute(
+    async def save_message(self, session_id: str, role: str, content: str) -> int | None:
+        """Store a message and return its row id."""
+        result = await self._write(
             "INSERT INTO conversations (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
             (session_id, role, content, datetime.now().isoformat()),
+            on_commit=lambda r: self.history_cache.on_save(session_id, r.lastrowid, role, content),
         )
-        await self.db.commit()
+        return result.lastrowid
 
-    async def get_history(self, session_id: str, limit: int = 20) -> list[dict]:
-        cursor = await self.db.execute(
-            "SELECT role, content FROM ("
+    async def get_history(self, session_id: str, limit: int = 20, after_id: int = 0) -> list[dict]:
+        """Return the last `limit` messages of a session, oldest first.
+
+        after_id excludes messages up to that id (e.g. ones already folded into a summary).
+        """
+        cached = self.history_cache.get(session_id, limit, after_id)
+        if cached is not None:
+            return cached
+
+        # Cold session: load a full ring buffer's worth so later turns are served from memory
+        cacheable = limit <= self.history_cache.max_messages
+        if cacheable:
+            self.history_cache.start_load(session_id)
+        rows = await self._read_all(
+            "SELECT id, role, content FROM ("
             "  SELECT role, content, id FROM conversations"
             "  WHERE session_id = ? ORDER BY id DESC LIMIT ?"
             ") sub ORDER BY id ASC",
-            (session_id, limit),
+            (session_id, self.history_cache.max_messages if cacheable else limit),
         )
-        rows = await cursor.fetchall()
-        return [{"role": row["role"], "content": row["content"]} for row in rows]
+        if cacheable:
+            self.history_cache.finish_load(
+                session_id, [{"id": r["id"], "role": r["role"], "content": r["content"]} for r in rows]
+            )
+        rows = rows[-limit:] if limit > 0 else []
+        return [{"role": r["role"], "content": r["content"]} for r in rows if r["id"] > after_id]
 
     async def clear_history(self, session_id: str):
-        await self.db.execute("DELETE FROM conversations WHERE session_id = ?", (session_id,))
-        await self.db.commit()
+        await self._write(
+            "DELETE FROM conversations WHERE session_id = ?", (session_id,),
+            on_commit=lambda _: self.history_cache.on_clear(session_id),
+        )
+        await self._write("DELETE FROM conversation_summaries WHERE session_id = ?", (session_id,))
+        await self._write("DELETE FROM file_references WHERE session_id = ?", (session_id,))
+
+    async def add_file_reference(self, session_id: str, path: str):
+        """Note that a session showed a served file (URL path like /generated/x.png)."""
+        await self._write(
+            "INSERT OR IGNORE INTO file_references (path, session_id) VALUES (?, ?)",
+            (path, session_id),
+        )
+
+    async def get_file_references(self) -> set[str]:
+        """URL paths of all files shown in a conversation that still exists."""
+        rows = await self._read_all("SELECT DISTINCT path FROM file_references")
+        return {r["path"] for r in rows}
+
+    async def get_summary(self, session_id: str) -> tuple[str | None, int]:
+        """Return (running summary, id of the last message folded into it)."""
+        row = await self._read_one(
+            "SELECT summary, last_message_id FROM conversation_summaries WHERE session_id = ?",
+            (session_id,),
+        )
+        return (row["summary"], row["last_message_id"]) if row else (None, 0)
+
+    async def save_summary(self, session_id: str, summary: str, last_message_id: int):
+        """Store a session's summary, unless its messages were deleted meanwhile.
+
+        A fold that was running while clear_history() ran must not write the
+        old summary back, so the upsert only happens if the last folded
+        message still exists.
+        """
+        await self._write(
+            """INSERT INTO conversation_summaries (session_id, summary, last_message_id, updated_at)
+               SELECT ?, ?, ?, ?
+               WHERE EXISTS (SELECT 1 FROM conversations WHERE id = ? AND session_id = ?)
+               ON CONFLICT(session_id) DO UPDATE SET summary = excluded.summary,
+                   last_message_id = excluded.last_message_id, updated_at = excluded.updated_at""",
+            (session_id, summary, last_message_id, datetime.now().isoformat(),
+             last_message_id, session_id),
+        )
 
     # --- Memory methods ---
 
+    async def _embed(self, text: str) -> bytes | None:
+        """Embed text with the configured embedder. Returns None if unavailable."""
+        if not self.embedder:
+            return None
+        try:
+            return encode_embedding(await self.embedder(text))
+        except Exception:
+            logger.debug("Embedding failed, storing memory without vector", exc_info=True)
+            return None
+
     async def remember(self, category: str, key: str, value: str):
-        await self.db.execute(
-            """INSERT INTO memory (category, key, value, timestamp) VALUES (?, ?, ?, ?)
-               ON CONFLICT(category, key) DO UPDATE SET value = excluded.value, timestamp = excluded.timestamp""",
-            (category, key, value, datetime.now().isoformat()),
+        embedding = await self._embed(memory_text(category, key, value))
+        await self._write(
+            """INSERT INTO memory (category, key, value, timestamp, embedding) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(category, key) DO UPDATE SET value = excluded.value,
+                   timestamp = excluded.timestamp, embedding = excluded.embedding""",
+            (category, key, value, datetime.now().isoformat(), embedding),
         )
-        await self.db.commit()
+        # Reads never touch the writer connection; the upsert is committed by now
+        row = await self._read_one(
+            "SELECT id FROM memory WHERE category = ? AND key = ?", (category, key)
+        )
+        if row:
+            if embedding is None:
+                self.vector_index.remove(row["id"])
+            else:
+                self.vector_index.upsert(row["id"], decode_embedding(embedding))
 
     async def recall(self, category: str, key: str) -> str | None:
-        cursor = await self.db.execute(
+        row = await self._read_one(
             "SELECT value FROM memory WHERE category = ? AND key = ?",
             (category, key),
         )
-        row = await cursor.fetchone()
         return row["value"] if row else None
 
     async def recall_category(self, category: str) -> list[dict]:
-        cursor = await self.db.execute(
+        rows = await self._read_all(
             "SELECT key, value FROM memory WHERE category = ? ORDER BY timestamp DESC",
             (category,),
         )
-        rows = await cursor.fetchall()
         return [{"key": row["key"], "value": row["value"]} for row in rows]
 
     async def forget(self, category: str, key: str):
-        await self.db.execute("DELETE FROM memory WHERE category = ? AND key = ?", (category, key))
-        await self.db.commit()
+        row = await self._read_one(
+            "SELECT id FROM memory WHERE category = ? AND key = ?", (category, key)
+        )
+        await self._write("DELETE FROM memory WHERE category = ? AND key = ?", (category, key))
+        if row:
+            self.vector_index.remove(row["id"])
 
     async def search_memory(self, query: str, limit: int = 20) -> list[dict]:
-        cursor = await self.db.execute(
+        """Full-text search over memory, ranked by BM25."""
+        match = _fts_query(query)
+        if match:
+            rows = await self._read_all(
+                "SELECT m.category, m.key, m.value, m.timestamp FROM memory_fts "
+                "JOIN memory m ON m.id = memory_fts.rowid "
+                "WHERE memory_fts MATCH ? ORDER BY bm25(memory_fts) LIMIT ?",
+                (match, limit),
+            )
+            return [{"category": r["category"], "key": r["key"], "value": r["value"], "timestamp": r["timestamp"]} for r in rows]
+        # No word characters (e.g. "+49") - fall back to substring search
+        rows = await self._read_all(
             "SELECT category, key, value, timestamp FROM memory "
             "WHERE key LIKE ? OR value LIKE ? ORDER BY timestamp DESC LIMIT ?",
             (f"%{query}%", f"%{query}%", limit),
         )
-        rows = await cursor.fetchall()
         return [{"category": r["category"], "key": r["key"], "value": r["value"], "timestamp": r["timestamp"]} for r in rows]
 
+    async def search_conversations(
+        self, query: str, session_id: str | None = None, limit: int = 20
+    ) -> list[dict]:
+        """Full-text search over chat history, ranked by BM25.
+
+        Returns matching messages with a highlighted snippet, optionally
+        restricted to one session.
+        """
+        match = _fts_query(query)
+        if not match:
+            return []
+        sql = (
+            "SELECT c.id, c.session_id, c.role, c.timestamp, "
+            "snippet(conversations_fts, 0, '**', '**', '...', 16) AS snippet "
+            "FROM conversations_fts JOIN conversations c ON c.id = conversations_fts.rowid "
+            "WHERE conversations_fts MATCH ?"
+        )
+        params: list = [match]
+        if session_id:
+            sql += " AND c.session_id = ?"
+            params.append(session_id)
+        sql += " ORDER BY bm25(conversations_fts) LIMIT ?"
+        params.append(limit)
+        rows = await self._read_all(sql, tuple(params))
+        return [
+            {"id": r["id"], "session_id": r["session_id"], "role": r["role"],
+             "snippet": r["snippet"], "timestamp": r["timestamp"]}
+            for r in rows
+        ]
+
     async def get_recent_memories(self, limit: int = 20) -> list[dict]:
-        cursor = await self.db.execute(
-            "SELECT category, key, value, timestamp FROM memory ORDER BY timestamp DESC LIMIT ?",
+        rows = await self._read_all(
+            "SELECT id, category, key, value, timestamp FROM memory ORDER BY timestamp DESC LIMIT ?",
             (limit,),
         )
-        rows = await cursor.fetchall()
-        return [{"category": r["category"], "key": r["key"], "value": r["value"], "timestamp": r["timestamp"]} for r in rows]
+        return [
+            {"id": r["id"], "category": r["category"], "key": r["key"], "value": r["value"],
+             "timestamp": r["timestamp"]}
+            for r in rows
+        ]
+
+    async def get_core_memories(self, categories: tuple[str, ...], limit: int = 30) -> list[dict]:
+        """The `limit` most recently saved memories of the given categories.
+
+        Returned in insertion order, so the prompt block stays stable across
+        turns until a core memory changes.
+        """
+        placeholders = ",".join("?" * len(categories))
+        rows = await self._read_all(
+            "SELECT id, category, key, value FROM ("
+            f"  SELECT id, category, key, value FROM memory WHERE category IN ({placeholders})"
+            "  ORDER BY timestamp DESC, id DESC LIMIT ?"
+            ") ORDER BY id",
+            (*categories, limit),
+        )
+        return [
+            {"id": r["id"], "category": r["category"], "key": r["key"], "value": r["value"]}
+            for r in rows
+        ]
+
+    async def get_relevant_memories(self, query: str, limit: int = 20) -> list[dict]:
+        """Return the memories most similar to query (cosine similarity).
+
+        Falls back to the most recent memories if no embedder is configured,
+        the query cannot be embedded or no memory has a vector yet.
+        """
+        if not self.embedder or not query.strip():
+            return await self.get_recent_memories(limit=limit)
+        try:
+            query_vec = normalize_query(await self.embedder(query))
+        except Exception:
+            logger.debug("Query embedding failed, using recent memories", exc_info=True)
+            query_vec = None
+        if query_vec is None:
+            return await self.get_recent_memories(limit=limit)
+
+        hits = self.vector_index.search(query_vec, limit)
+        if not hits:
+            return await self.get_recent_memories(limit=limit)
+
+        placeholders = ",".join("?" * len(hits))
+        rows = await self._read_all(
+            f"SELECT id, category, key, value, timestamp FROM memory WHERE id IN ({placeholders})",
+            tuple(item_id for item_id, _ in hits),
+        )
+        rows = {r["id"]: r for r in rows}
+        return [
+            {"id": i, "category": rows[i]["category"], "key": rows[i]["key"], "value": rows[i]["value"],
+             "timestamp": rows[i]["timestamp"], "score": score}
+            for i, score in hits if i in rows
+        ]
+
+    async def backfill_embeddings(self, batch_size: int = 50) -> int:
+        """Embed memories stored without a vector. Returns the number embedded."""
+        if not self.embedder:
+            return 0
+        done = 0
+        while True:
+            rows = await self._read_all(
+                "SELECT id, category, key, value FROM memory WHERE embedding IS NULL LIMIT ?",
+                (batch_size,),
+            )
+            if not rows:
+                break
+            embedded = []
+            for r in rows:
+                embedding = await self._embed(memory_text(r["category"], r["key"], r["value"]))
+                if embedding is not None:
+                    embedded.append((r["id"], embedding))
+            # Through the write queue, so the updates share its group commits
+            await asyncio.gather(*(
+                self._write("UPDATE memory SET embedding = ? WHERE id = ?", (embedding, memory_id))
+                for memory_id, embedding in embedded
+            ))
+            for memory_id, embedding in embedded:
+                self.vector_index.upsert(memory_id, decode_embedding(embedding))
+            updated = len(embedded)
+            done += updated
+            if updated < len(rows):
+                # Embedder is failing - retry on next startup
+                break
+        if done:
+            logger.info(f"Backfilled embeddings for {done} memories")
+        return done
 
     async def get_all_categories(self) -> list[str]:
-        cursor = await self.db.execute(
+        rows = await self._read_all(
             "SELECT DISTINCT category FROM memory ORDER BY category"
         )
-        rows = await cursor.fetchall()
         return [r["category"] for r in rows]
 
     async def delete_category(self, category: str):
-        await self.db.execute("DELETE FROM memory WHERE category = ?", (category,))
-        await self.db.commit()
+        rows = await self._read_all("SELECT id FROM memory WHERE category = ?", (category,))
+        ids = [r["id"] for r in rows]
+        await self._write("DELETE FROM memory WHERE category = ?", (category,))
+        self.vector_index.remove_many(ids)
 
     async def count_memories(self) -> int:
-        cursor = await self.db.execute("SELECT COUNT(*) as cnt FROM memory")
-        row = await cursor.fetchone()
+        row = await self._read_one(
+            "SELECT COALESCE(SUM(value), 0) as cnt FROM stats_counters WHERE name LIKE 'memory:%'"
+        )
         return row["cnt"] if row else 0
 
-    # --- Raw execute for stores ---
+    async def get_aggregates(self) -> dict:
+        """Dashboard counts from the trigger-maintained counters; cost does not grow with history."""
+        rows = await self._read_all("SELECT name, value FROM stats_counters WHERE value > 0")
+        counts = {r["name"]: r["value"] for r in rows}
+
+        def group(prefix: str) -> dict[str, int]:
+            return {n[len(prefix):]: v for n, v in counts.items() if n.startswith(prefix)}
+
+        memory = group("memory:")
+        projects = group("project:")
+        projects["total"] = sum(projects.values())
+        tasks = group("task:")
+        tasks["total"] = sum(tasks.values())
+        return {
+            "conversations": counts.get("sessions", 0),
+            "memories": sum(memory.values()),
+            "memory_by_category": [
+                {"category": c, "count": n}
+                for c, n in sorted(memory.items(), key=lambda item: item[1], reverse=True)
+            ],
+            "projects": projects,
+            "tasks": tasks,
+        }
+
+    # --- Raw execute for stores (fetchall/fetchone are read-only) ---
 
     async def execute(self, sql: str, params: tuple = ()):
-        cursor = await self.db.execute(sql, params)
-        await self.db.commit()
-        return cursor
+        """Run a write statement and wait until it is committed.
+
+        Returns the cursor, or a WriteResult in write-behind mode; both
+        expose lastrowid and rowcount.
+        """
+        return await self._write(sql, params)
 
     async def fetchall(self, sql: str, params: tuple = ()) -> list:
-        cursor = await self.db.execute(sql, params)
-        return await cursor.fetchall()
+        return await self._read_all(sql, params)
 
     async def fetchone(self, sql: str, params: tuple = ()):
-        cursor = await self.db.execute(sql, params)
-        return await cursor.fetchone()
+        return await self._read_one(sql, params)
@@ -0,0 +1,34 @@
+import numpy as np
+
+
+def memory_text(category: str, key: str, value: str) -> str:
+    """Text that gets embedded for a memory row."""
+    return f"{category}: {key}: {value}"
+
+
+def encode_embedding(vector: list[float]) -> bytes | None:
+    """Normalize a vector to unit length and pack it as a float32 blob.
+
+    Stored vectors are unit length, so cosine similarity is a plain dot product.
+    """
+    arr = np.asarray(vector, dtype=np.float32)
+    if arr.ndim != 1 or arr.size == 0:
+        return None
+    norm = float(np.linalg.norm(arr))
+    if norm == 0.0:
+        return None
+    return (arr / norm).astype(np.float32).tobytes()
+
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+def normalize_query(vector: list[float]) -> np.ndarray | None:
+    arr = np.asarray(vector, dtype=np.float32)
+    if arr.ndim != 1 or arr.size == 0:
+        return None
+    norm = float(np.linalg.norm(arr))
+    if norm == 0.0:
+        return None
+    return arr / norm
@@ -1,6 +1,10 @@
+import asyncio
 import json
 import logging
 import re
+import time
+
+from llm.scheduler import Priority, current_priority
 
 logger = logging.getLogger(__name__)
 
@@ -23,20 +27,49 @@ Gespraech:
 JSON-Array:"""
 
 
+# Cheap pre-filter: facts about the user almost always come with a first-person marker
+_SELF_REFERENCE_RE = re.compile(
+    r"\b(ich|mein\w*|mir|mich|wir|unser\w*|bin|habe|hab|heisse|heiße|wohne|arbeite|"
+    r"mag|liebe|hasse|i|i'm|my|me)\b",
+    re.IGNORECASE,
+)
+# Per-message cap inside a batched extraction prompt
+_MAX_TURN_CHARS = 2000
+
+
+def may_contain_facts(user_message: str) -> bool:
+    """Heuristic check whether a user message can contain new facts about the user."""
+    if len(user_message) < 10:
+        return False
+    return bool(_SELF_REFERENCE_RE.search(user_message))
+
+
 async def extract_facts(ollama, db, user_message: str, assistant_message: str):
     """Extract user facts from a conversation turn and store them in memory.
 
+    Runs as fire-and-forget — errors are logged but never raised.
+    """
+    await extract_facts_from_turns(ollama, db, [(user_message, assistant_message)])
+
+
+async def extract_facts_from_turns(ollama, db, turns: list[tuple[str, str]]):
+    """Extract user facts from several (user, assistant) turns with one LLM call.
+
     Runs as fire-and-forget — errors are logged but never raised.
     """
     try:
         # Skip very short or trivial exchanges
-        if len(user_message) < 10:
+        turns = [t for t in turns if may_contain_facts(t[0])]
+        if not turns:
             return
 
-        conversation = f"Nutzer: {user_message}\nAssistentin: {assistant_message}"
+        conversation = "\n".join(
+            f"Nutzer: {user[:_MAX_TURN_CHARS]}\nAssistentin: {assistant[:_MAX_TURN_CHARS]}"
+            for user, assistant in turns
+        )
         prompt = EXTRACTION_PROMPT.format(conversation=conversation)
 
-        raw = await ollama.generate(prompt)
+        raw = await ollama.generate(prompt, options={"temperature": 0})
 
         # Extract JSON array from response (model may wrap it in text/think blocks)
         raw = re.sub(r"<think>[\s\S]*?</think>", "", raw, flags=re.IGNORECASE)
@@ -48,14 +81,16 @@ async def extract_facts(ollama, db, user_message: str, assistant_message: str):
         if not isinstance(facts, list):
             return
 
-        stored = 0
+        writes = []
         for fact in facts:
             cat = fact.get("category", "").strip()
             key = fact.get("key", "").strip()
             val = fact.get("value", "").strip()
             if cat and key and val and len(val) <= 200:
-                await db.remember(cat, key, val)
-                stored += 1
+                writes.append(db.remember(cat, key, val))
+        # Submit together so write-behind mode commits all facts in one transaction
+        await asyncio.gather(*writes)
+        stored = len(writes)
 
         if stored:
             logger.info(f"Fact extractor: stored {stored} facts")
@@ -64,3 +99,115 @@ async def extract_facts(ollama, db, user_message: str, assistant_message: str):
         logger.debug("Fact extractor: could not parse JSON from LLM response")
     except Exception:
         logger.debug("Fact extractor: extraction failed", exc_info=True)
+
+
+class FactExtractionQueue:
+    """Debounced, low-priority fact extraction.
+
+    Turns are collected per session and extracted together once the session
+    has been quiet for `debounce_seconds` or `max_turns` have accumulated;
+    one extraction covers at most `max_turns` turns. A single worker runs
+    one extraction at a time and only while no interactive chat turn is in
+    progress.
+    """
+
+    def __init__(self, ollama, db, debounce_seconds: float = 30, max_turns: int = 5):
+        self.ollama = ollama
+        self.db = db
+        self.debounce_seconds = debounce_seconds
+        self.max_turns = max_turns
+        self._pending: dict[str, list[tuple[str, str]]] = {}
+        self._last_turn: dict[str, float] = {}
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._active_turns = 0
+        self._worker: asyncio.Task | None = None
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def close(self, flush_timeout: float = 10):
+        """Stop the worker and extract what is still pending, for at most flush_timeout seconds."""
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        try:
+            await asyncio.wait_for(self._flush(), flush_timeout)
+        except asyncio.TimeoutError:
+            pass
+        dropped = sum(len(turns) for turns in self._pending.values())
+        if dropped:
+            logger.warning(f"Fact extraction: {dropped} pending turns dropped on shutdown")
+        self._pending.clear()
+        self._last_turn.clear()
+
+    # --- Foreground tracking ---
+
+    def turn_started(self):
+        self._active_turns += 1
+        self._idle.clear()
+
+    def turn_finished(self):
+        self._active_turns = max(self._active_turns - 1, 0)
+        if not self._active_turns:
+            self._idle.set()
+
+    # --- Queue ---
+
+    def add_turn(self, session_id: str, user_message: str, assistant_message: str):
+        if not may_contain_facts(user_message):
+            return
+        self._pending.setdefault(session_id, []).append((user_message, assistant_message))
+        self._last_turn[session_id] = time.monotonic()
+        self._wakeup.set()
+
+    async def _flush(self):
+        while self._pending:
+            session_id = next(iter(self._pending))
+            await extract_facts_from_turns(self.ollama, self.db, self._take(session_id))
+
+    def _take(self, session_id: str) -> list[tuple[str, str]]:
+        """Remove and return up to max_turns of a session's pending turns (oldest first)."""
+        turns = self._pending[session_id]
+        batch, rest = turns[:self.max_turns], turns[self.max_turns:]
+        if rest:
+            self._pending[session_id] = rest
+        else:
+            del self._pending[session_id]
+            self._last_turn.pop(session_id, None)
+        return batch
+
+    def _next_due(self) -> tuple[str | None, float | None]:
+        """Return (session due now, seconds until the next one is due)."""
+        now = time.monotonic()
+        wait = None
+        for session_id, turns in self._pending.items():
+            due_in = self._last_turn[session_id] + self.debounce_seconds - now
+            if due_in <= 0 or len(turns) >= self.max_turns:
+                return session_id, 0
+            wait = due_in if wait is None else min(wait, due_in)
+        return None, wait
+
+    async def _run(self):
+        current_priority.set(Priority.BACKGROUND)
+        while True:
+            session_id, wait = self._next_due()
+            if session_id is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Yield to interactive turns - extraction must never delay them
+            await self._idle.wait()
+            turns = self._take(session_id) if session_id in self._pending else []
+            if turns:
+                await extract_facts_from_turns(self.ollama, self.db, turns)
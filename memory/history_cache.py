@@ -0,0 +1,79 @@
+from collections import OrderedDict, deque
+
+
+class HistoryCache:
+    """Per-session ring buffers of the most recent messages, LRU-evicted across sessions.
+
+    Each cached session holds its last ``max_messages`` messages exactly as
+    stored in SQLite. Writes go through on_save / on_clear so the buffers never
+    need to be re-read while a session stays active.
+    """
+
+    def __init__(self, max_sessions: int = 256, max_messages: int = 50):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self._sessions: OrderedDict[str, deque] = OrderedDict()
+        # Sessions with a cold load in flight -> True if written to meanwhile
+        self._loading: dict[str, bool] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id: str, limit: int, after_id: int = 0) -> list[dict] | None:
+        """Return the last `limit` messages with id > after_id, or None if the session is not cached."""
+        if limit > self.max_messages:
+            return None
+        buf = self._sessions.get(session_id)
+        if buf is None:
+            self.misses += 1
+            return None
+        self._sessions.move_to_end(session_id)
+        self.hits += 1
+        start = max(len(buf) - limit, 0)
+        return [
+            {"role": buf[i]["role"], "content": buf[i]["content"]}
+            for i in range(start, len(buf))
+            if buf[i]["id"] > after_id
+        ]
+
+    def start_load(self, session_id: str):
+        self._loading[session_id] = False
+
+    def finish_load(self, session_id: str, messages: list[dict]):
+        """Cache rows (id, role, content) read from SQLite unless the session was written during the read."""
+        dirty = self._loading.pop(session_id, True)
+        if dirty or session_id in self._sessions:
+            return
+        self._put(session_id, deque((dict(m) for m in messages), maxlen=self.max_messages))
+
+    def on_save(self, session_id: str, message_id: int | None, role: str, content: str):
+        if session_id in self._loading:
+            self._loading[session_id] = True
+        buf = self._sessions.get(session_id)
+        if buf is None:
+            return
+        if message_id is None:
+            # Unknown id - let the next read reload the session
+            del self._sessions[session_id]
+        elif not buf or message_id > buf[-1]["id"]:
+            # A cold load that finished after the commit may already contain this row
+            buf.append({"id": message_id, "role": role, "content": content})
+            self._sessions.move_to_end(session_id)
+
+    def on_clear(self, session_id: str):
+        if session_id in self._loading:
+            self._loading[session_id] = True
+        # A cleared session is known to be empty - cache that too
+        self._put(session_id, deque(maxlen=self.max_messages))
+
+    def _put(self, session_id: str, buf: deque):
+        self._sessions[session_id] = buf
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
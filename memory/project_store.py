@@ -1,6 +1,7 @@
 import json
 import logging
 from datetime import datetime
+from typing import Callable
 
 logger = logging.getLogger(__name__)
 
@@ -8,12 +9,19 @@ logger = logging.getLogger(__name__)
 class ProjectStore:
     def __init__(self, db):
         self.db = db
+        # Called after projects or tasks were modified (dashboard updates)
+        self.on_change: Callable[[], None] | None = None
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change()
 
     async def create_project(self, name: str, description: str = "") -> dict:
         cursor = await self.db.execute(
             "INSERT INTO projects (name, description) VALUES (?, ?)",
             (name, description),
         )
+        self._changed()
         return {"id": cursor.lastrowid, "name": name, "description": description, "status": "active"}
 
     async def list_projects(self, status: str | None = None) -> list[dict]:
@@ -44,6 +52,7 @@ class ProjectStore:
         await self.db.execute(
             f"UPDATE projects SET {', '.join(sets)} WHERE name = ?", tuple(values)
         )
+        self._changed()
         return True
 
     async def delete_project(self, name: str) -> bool:
@@ -52,6 +61,7 @@ class ProjectStore:
             return False
         await self.db.execute("DELETE FROM tasks WHERE project_id = ?", (project["id"],))
         await self.db.execute("DELETE FROM projects WHERE name = ?", (name,))
+        self._changed()
         return True
 
     # --- Tasks ---
@@ -64,6 +74,7 @@ class ProjectStore:
             "INSERT INTO tasks (project_id, title, description, priority) VALUES (?, ?, ?, ?)",
             (project["id"], title, description, priority),
         )
+        self._changed()
         return {"id": cursor.lastrowid, "title": title, "status": "pending"}
 
     async def list_tasks(self, project_name: str) -> list[dict]:
@@ -78,6 +89,7 @@ class ProjectStore:
 
     async def update_task(self, task_id: int, status: str) -> bool:
         await self.db.execute("UPDATE tasks SET status = ? WHERE id = ?", (status, task_id))
+        self._changed()
         return True
 
     # --- Extended queries (UI endpoints) ---
@@ -120,8 +132,10 @@ class ProjectStore:
         await self.db.execute(
             f"UPDATE tasks SET {', '.join(sets)} WHERE id = ?", tuple(values)
         )
+        self._changed()
         return True
 
     async def delete_task(self, task_id: int) -> bool:
         await self.db.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        self._changed()
         return True
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import re
+
+from llm.resilience import current_deadline
+from llm.scheduler import Priority, current_priority
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """Du fuehrst eine laufende Zusammenfassung eines Gespraechs zwischen Marlon (Nutzer) und Clara (KI-Assistentin).
+
+Bisherige Zusammenfassung:
+{summary}
+
+Neue Nachrichten:
+{messages}
+
+Schreibe die aktualisierte Zusammenfassung auf Deutsch (max. 250 Woerter).
+Regeln:
+- Behalte wichtige Fakten, Entscheidungen, Ergebnisse, offene Fragen und Aufgaben
+- Lass Smalltalk und Wiederholungen weg
+- KEINE Einleitung, NUR die Zusammenfassung
+
+Zusammenfassung:"""
+
+# Per-message cap when feeding turns into the summary prompt
+_MAX_MESSAGE_CHARS = 1500
+# Max messages folded per LLM call (old sessions are caught up in several rounds)
+_MAX_FOLD_MESSAGES = 40
+
+
+class ConversationSummarizer:
+    """Folds older turns of a session into a stored running summary in the background.
+
+    Only messages newer than the last summary are read, and the most recent
+    `keep_recent` messages always stay raw. Summarization starts once at least
+    `batch` messages are waiting to be folded, and runs one session at a time.
+    """
+
+    def __init__(self, ollama, db, keep_recent: int = 8, batch: int = 8):
+        self.ollama = ollama
+        self.db = db
+        self.keep_recent = keep_recent
+        self.batch = batch
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._rerun: set[str] = set()
+        self._lock = asyncio.Lock()
+
+    def schedule(self, session_id: str):
+        """Request a summary update for a session (coalesced if one is already running)."""
+        task = self._tasks.get(session_id)
+        if task and not task.done():
+            self._rerun.add(session_id)
+            return
+        self._tasks[session_id] = asyncio.create_task(self._run(session_id))
+
+    async def _run(self, session_id: str):
+        # Runs detached from the turn that scheduled it
+        current_priority.set(Priority.BACKGROUND)
+        current_deadline.set(None)
+        try:
+            while True:
+                self._rerun.discard(session_id)
+                async with self._lock:
+                    while await self._fold_once(session_id):
+                        pass
+                if session_id not in self._rerun:
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.debug(f"Summarizer: update for {session_id} failed", exc_info=True)
+        finally:
+            self._tasks.pop(session_id, None)
+
+    async def _fold_once(self, session_id: str) -> bool:
+        """Fold the next chunk of unsummarized messages. Returns True if more are pending."""
+        summary, last_id = await self.db.get_summary(session_id)
+
+        # Oldest message of the raw window that is always sent verbatim
+        boundary = await self.db.fetchone(
+            "SELECT id FROM conversations WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?",
+            (session_id, self.keep_recent - 1),
+        )
+        if not boundary:
+            return False
+        rows = await self.db.fetchall(
+            "SELECT id, role, content FROM conversations "
+            "WHERE session_id = ? AND id > ? AND id < ? ORDER BY id LIMIT ?",
+            (session_id, last_id, boundary["id"], _MAX_FOLD_MESSAGES),
+        )
+        if len(rows) < self.batch:
+            return False
+
+        lines = []
+        for r in rows:
+            speaker = "Marlon" if r["role"] == "user" else "Clara"
+            content = r["content"]
+            if len(content) > _MAX_MESSAGE_CHARS:
+                content = content[:_MAX_MESSAGE_CHARS] + " ..."
+            lines.append(f"{speaker}: {content}")
+
+        prompt = SUMMARY_PROMPT.format(
+            summary=summary or "(noch keine)",
+            messages="\n".join(lines),
+        )
+        raw = await self.ollama.generate(prompt)
+        new_summary = re.sub(r"<think>[\s\S]*?</think>", "", raw, flags=re.IGNORECASE).strip()
+        if not new_summary:
+            return False
+
+        await self.db.save_summary(session_id, new_summary, rows[-1]["id"])
+        logger.info(f"Summarizer: folded {len(rows)} messages of {session_id}")
+        return len(rows) == _MAX_FOLD_MESSAGES
+
+    async def close(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        for task in list(self._tasks.values()):
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks.clear()
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex:
+    """Process-local index of unit-length float32 vectors keyed by row id.
+
+    Vectors live in one contiguous matrix so a top-k query is a single
+    matmul. Deletes swap the last row into the hole to stay contiguous.
+    """
+
+    def __init__(self):
+        self.dim: int | None = None
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._rows: dict[int, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._rows
+
+    def clear(self):
+        self.__init__()
+
+    def build(self, items: list[tuple[int, np.ndarray]]):
+        """Replace the index contents with (id, vector) pairs."""
+        self.clear()
+        items = [(i, v) for i, v in items if v.size]
+        if not items:
+            return
+        self.dim = items[0][1].size
+        items = [(i, v) for i, v in items if v.size == self.dim]
+        self._matrix = np.vstack([v for _, v in items]).astype(np.float32, copy=False)
+        self._ids = np.fromiter((i for i, _ in items), dtype=np.int64, count=len(items))
+        self._rows = {int(i): row for row, i in enumerate(self._ids)}
+        self._size = len(items)
+
+    def _ensure_writable(self, extra: int = 0):
+        """Grow the buffers (and detach from a read-only memmap) if needed."""
+        needed = self._size + extra
+        capacity = self._matrix.shape[0]
+        if needed <= capacity and self._matrix.flags.writeable:
+            return
+        new_capacity = max(needed, capacity * 2 if needed > capacity else capacity, 64)
+        matrix = np.empty((new_capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids = np.empty(new_capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._ids = matrix, ids
+
+    def upsert(self, item_id: int, vector: np.ndarray) -> bool:
+        """Insert or replace the vector for item_id. Returns False on dimension mismatch."""
+        if self.dim is None:
+            self.dim = vector.size
+            self._matrix = np.empty((0, self.dim), dtype=np.float32)
+        if vector.size != self.dim:
+            logger.debug(f"Vector index: dimension {vector.size} != {self.dim}, ignoring id {item_id}")
+            self.remove(item_id)
+            return False
+        row = self._rows.get(item_id)
+        if row is None:
+            self._ensure_writable(extra=1)
+            row = self._size
+            self._size += 1
+            self._rows[item_id] = row
+            self._ids[row] = item_id
+        else:
+            self._ensure_writable()
+        self._matrix[row] = vector
+        return True
+
+    def remove(self, item_id: int):
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return
+        self._ensure_writable()
+        last = self._size - 1
+        if row != last:
+            moved_id = int(self._ids[last])
+            self._matrix[row] = self._matrix[last]
+            self._ids[row] = moved_id
+            self._rows[moved_id] = row
+        self._size = last
+
+    def remove_many(self, item_ids):
+        for item_id in item_ids:
+            self.remove(item_id)
+
+    def search(self, query: np.ndarray, k: int) -> list[tuple[int, float]]:
+        """Return up to k (id, cosine score) pairs, best first."""
+        if not self._size or k <= 0 or query.size != self.dim:
+            return []
+        scores = self._matrix[:self._size] @ query
+        k = min(k, self._size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self._ids[i]), float(scores[i])) for i in top]
+
+    # --- Persistence ---
+
+    @staticmethod
+    def signature(rows: list[tuple[int, str]]) -> str:
+        """Fingerprint of (id, timestamp) pairs used to detect a stale snapshot."""
+        h = hashlib.sha1()
+        for item_id, ts in sorted(rows):
+            h.update(f"{item_id}:{ts}\n".encode())
+        return h.hexdigest()
+
+    def save(self, path: Path, signature: str):
+        """Write the index as <path> (matrix), <path>.ids.npy and <path>.json."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.save(path, np.ascontiguousarray(self._matrix[:self._size]))
+        np.save(path.with_suffix(".ids.npy"), self._ids[:self._size])
+        path.with_suffix(".json").write_text(
+            json.dumps({"dim": self.dim, "count": self._size, "signature": signature}),
+            encoding="utf-8",
+        )
+
+    def load(self, path: Path, signature: str) -> bool:
+        """Memory-map a saved index. Returns False if missing or stale."""
+        meta_path = path.with_suffix(".json")
+        ids_path = path.with_suffix(".ids.npy")
+        if not (path.exists() and ids_path.exists() and meta_path.exists()):
+            return False
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("signature") != signature:
+                return False
+            matrix = np.load(path, mmap_mode="r")
+            ids = np.load(ids_path)
+        except Exception:
+            logger.warning(f"Vector index snapshot at {path} is unreadable", exc_info=True)
+            return False
+        if matrix.ndim != 2 or matrix.shape[0] != ids.shape[0]:
+            return False
+        self.clear()
+        self.dim = meta.get("dim") or (matrix.shape[1] if matrix.shape[0] else None)
+        self._matrix = matrix
+        self._ids = ids
+        self._rows = {int(i): row for row, i in enumerate(ids)}
+        self._size = ids.shape[0]
+        return True
@@ -3,6 +3,8 @@ from datetime import datetime
 
 from chat.adapters import ChannelAdapter, WebSocketAdapter
 from config import Config
+from llm.resilience import run_with_deadline
+from llm.scheduler import Priority, run_with_priority
 
 logger = logging.getLogger(__name__)
 
@@ -95,12 +97,15 @@ class NotificationService:
             return
         adapter = CollectorAdapter()
         try:
-            response = await self._chat_engine.handle_message(
-                channel=adapter,
-                session_id="automation-internal",
-                user_message=user_message,
-                allowed_skills=None,
-            )
+            response = await run_with_priority(Priority.AUTOMATION, run_with_deadline(
+                Config.AUTOMATION_DEADLINE,
+                self._chat_engine.handle_message(
+                    channel=adapter,
+                    session_id="automation-internal",
+                    user_message=user_message,
+                    allowed_skills=None,
+                ),
+            ))
             if response:
                 await self.notify(response)
         except Exception:
@@ -1,19 +1,26 @@
 import asyncio
 import logging
+from typing import Awaitable, Callable
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 logger = logging.getLogger(__name__)
 
+_CRON_FORMAT_ERROR = "Fehler: Cron-Ausdruck muss 5 Felder haben (Minute Stunde Tag Monat Wochentag)."
+
 
 class SchedulerEngine:
     def __init__(self, db=None, event_bus=None):
         self.scheduler = AsyncIOScheduler()
         self._jobs: dict[str, dict] = {}
+        # Clara's own maintenance jobs; not listed to or removable by the user
+        self._internal_jobs: dict[str, dict] = {}
         self.db = db
         self.event_bus = event_bus
         self.skill_registry = None
         self.notification_service = None
+        # Called after jobs were added or removed (dashboard updates)
+        self.on_change: Callable[[], None] | None = None
 
     async def start(self):
         self.scheduler.start()
@@ -48,17 +55,9 @@ class SchedulerEngine:
             return f"Aufgabe '{name}' existiert bereits."
 
         try:
-            parts = cron.strip().split()
-            if len(parts) != 5:
-                return "Fehler: Cron-Ausdruck muss 5 Felder haben (Minute Stunde Tag Monat Wochentag)."
-
-            trigger = CronTrigger(
-                minute=parts[0],
-                hour=parts[1],
-                day=parts[2],
-                month=parts[3],
-                day_of_week=parts[4],
-            )
+            trigger = self._cron_trigger(cron)
+            if trigger is None:
+                return _CRON_FORMAT_ERROR
 
             def job_func():
                 asyncio.get_event_loop().create_task(self._execute_job(name, command))
@@ -72,11 +71,52 @@ class SchedulerEngine:
                     (name, cron, command),
                 )
 
+            if self.on_change:
+                self.on_change()
             return f"Aufgabe '{name}' geplant mit Cron '{cron}'."
 
         except Exception as e:
             return f"Fehler beim Planen: {e}"
 
+    @staticmethod
+    def _cron_trigger(cron: str) -> CronTrigger | None:
+        parts = cron.strip().split()
+        if len(parts) != 5:
+            return None
+        return CronTrigger(
+            minute=parts[0],
+            hour=parts[1],
+            day=parts[2],
+            month=parts[3],
+            day_of_week=parts[4],
+        )
+
+    def add_internal_job(self, name: str, cron: str, func: Callable[[], Awaitable]):
+        """Schedule one of Clara's own maintenance coroutines (not persisted, no shell command).
+
+        Internal jobs live apart from user jobs, so task_scheduler neither
+        lists nor removes them. Raises ValueError if the name is taken or
+        the cron expression is invalid.
+        """
+        if name in self._internal_jobs:
+            raise ValueError(f"Interne Aufgabe '{name}' existiert bereits.")
+        trigger = self._cron_trigger(cron)
+        if trigger is None:
+            raise ValueError(_CRON_FORMAT_ERROR)
+
+        def job_func():
+            asyncio.get_event_loop().create_task(self._execute_internal_job(name, func))
+
+        self.scheduler.add_job(job_func, trigger, id=f"internal:{name}", name=name)
+        self._internal_jobs[name] = {"name": name, "cron": cron}
+
+    async def _execute_internal_job(self, name: str, func: Callable[[], Awaitable]):
+        logger.info(f"Internal job '{name}' triggered")
+        try:
+            await func()
+        except Exception:
+            logger.exception(f"Internal job '{name}' failed")
+
     async def _execute_job(self, name: str, command: str):
         logger.info(f"Scheduled job '{name}' triggered: {command}")
 
@@ -114,4 +154,6 @@ class SchedulerEngine:
         del self._jobs[name]
         if self.db:
             await self.db.execute("DELETE FROM scheduled_jobs WHERE name = ?", (name,))
+        if self.on_change:
+            self.on_change()
         return f"Aufgabe '{name}' entfernt."
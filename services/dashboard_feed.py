@@ -0,0 +1,117 @@
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[dict]]
+
+
+class DashboardFeed:
+    """Pushes dashboard sections to connected clients when they change.
+
+    Each section ("stats", "status", ...) has a loader. notify() marks
+    sections as changed; after a short debounce their loaders run once and
+    the result is sent to every client, but only if it differs from what
+    was sent last. Periodic sections are also refreshed every
+    `refresh_interval` seconds. Without connected clients nothing is
+    loaded at all.
+    """
+
+    def __init__(self, debounce: float = 0.5, refresh_interval: float = 60):
+        self.debounce = debounce
+        self.refresh_interval = refresh_interval
+        self._loaders: dict[str, Loader] = {}
+        self._periodic: list[str] = []
+        self._clients: set[asyncio.Queue] = set()
+        self._last: dict[str, str] = {}
+        self._dirty: set[str] = set()
+        self._flush_task: asyncio.Task | None = None
+        self._refresh_task: asyncio.Task | None = None
+
+    def register(self, section: str, loader: Loader, periodic: bool = False):
+        self._loaders[section] = loader
+        if periodic:
+            self._periodic.append(section)
+
+    def notify(self, *sections: str):
+        """Mark sections (default: all) as changed. Cheap; safe to call from any code path."""
+        if not self._clients:
+            return
+        self._dirty.update(sections or self._loaders)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def on_event(self, event):
+        """EventBus subscriber: new events show up in the activity list."""
+        if event.type == "storage_gc":
+            self.notify("activity", "storage")
+        else:
+            self.notify("activity")
+
+    async def subscribe(self) -> asyncio.Queue:
+        """Register a client. Its queue starts with a full snapshot of all sections."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self._clients.add(queue)
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+        results = await asyncio.gather(*(self._load(s) for s in self._loaders))
+        for section, data in zip(self._loaders, results):
+            if data is not None and not self._publish(section, data):
+                # Unchanged for the others, but the new client has nothing yet
+                self._send(queue, {"type": section, "data": data})
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._clients.discard(queue)
+        if not self._clients:
+            self._last.clear()
+            self._dirty.clear()
+            for task in (self._refresh_task, self._flush_task):
+                if task and not task.done():
+                    task.cancel()
+
+    async def _flush(self):
+        await asyncio.sleep(self.debounce)
+        sections, self._dirty = self._dirty, set()
+        results = await asyncio.gather(*(self._load(s) for s in sections))
+        for section, data in zip(sections, results):
+            if data is not None:
+                self._publish(section, data)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            if self._periodic:
+                self.notify(*self._periodic)
+
+    async def _load(self, section: str) -> dict | None:
+        try:
+            return await self._loaders[section]()
+        except Exception:
+            logger.exception(f"Dashboard section '{section}' failed to load")
+            return None
+
+    def _publish(self, section: str, data: dict) -> bool:
+        """Send a section to all clients if it changed. Returns whether it was sent."""
+        blob = json.dumps(data, sort_keys=True, default=str)
+        if self._last.get(section) == blob:
+            return False
+        self._last[section] = blob
+        message = {"type": section, "data": data}
+        for queue in list(self._clients):
+            self._send(queue, message)
+        return True
+
+    @staticmethod
+    def _send(queue: asyncio.Queue, message: dict):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Client is not reading; it gets the next change instead
+            logger.debug("Dashboard client queue full, dropping update")
+
+    async def close(self):
+        for queue in list(self._clients):
+            self.unsubscribe(queue)
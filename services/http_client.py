@@ -0,0 +1,53 @@
+import logging
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """Shared aiohttp session for all outbound HTTP (Ollama, Stable Diffusion, web fetches).
+
+    One connector pools keep-alive connections per host and caches DNS
+    lookups, so repeated calls skip the TCP/TLS handshake. The session is
+    created lazily inside the running event loop. Requests should take
+    their timeout from timeout(): aiohttp replaces the session timeout with
+    a request's own instead of merging the two.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 16,
+        keepalive_timeout: float = 30,
+        dns_cache_ttl: int = 300,
+        connect_timeout: float = 10,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.connect_timeout = connect_timeout
+        self._session: aiohttp.ClientSession | None = None
+
+    async def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout(None))
+        return self._session
+
+    def timeout(self, total: float | None) -> aiohttp.ClientTimeout:
+        """Request timeout with the shared connect timeout applied."""
+        return aiohttp.ClientTimeout(total=total, sock_connect=self.connect_timeout)
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
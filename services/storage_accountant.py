@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Scan:
+    """State of a directory walk, so it can continue in the next batch."""
+    pending: list[str]
+    iterator: object | None = None
+    bytes: int = 0
+    files: int = 0
+
+    @property
+    def done(self) -> bool:
+        return self.iterator is None and not self.pending
+
+
+def _scan_batch(scan: _Scan, limit: int):
+    """Visit up to `limit` directory entries (runs in the executor)."""
+    visited = 0
+    while visited < limit:
+        if scan.iterator is None:
+            if not scan.pending:
+                return
+            try:
+                scan.iterator = os.scandir(scan.pending.pop())
+            except OSError:
+                continue
+        entry = next(scan.iterator, None)
+        if entry is None:
+            scan.iterator.close()
+            scan.iterator = None
+            continue
+        visited += 1
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                scan.pending.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                scan.bytes += entry.stat(follow_symlinks=False).st_size
+                scan.files += 1
+        except OSError:
+            continue
+
+
+@dataclass
+class _Usage:
+    bytes: int = 0
+    files: int = 0
+    scanned_at: float | None = None
+
+
+class StorageAccountant:
+    """Byte and file counts per directory, kept current without walking the tree.
+
+    Code that writes or deletes files reports it (add_file / remove_file),
+    so reads are instant. A background reconcile walks every directory with
+    os.scandir, `batch_size` entries per executor call, and replaces the
+    counts; this corrects drift from writers that do not report (SQLite,
+    logs). A walk that is interrupted continues where it stopped.
+    """
+
+    def __init__(self, dirs: dict[str, Path], interval: float = 3600, batch_size: int = 1000):
+        self.dirs = {name: Path(path).resolve() for name, path in dirs.items()}
+        self.interval = interval
+        self.batch_size = batch_size
+        self._usage = {name: _Usage() for name in self.dirs}
+        self._scans: dict[str, _Scan] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def add_file(self, path: Path, size: int | None = None):
+        """Count a newly written file in every tracked directory that contains it."""
+        if size is None:
+            try:
+                size = os.stat(path).st_size
+            except OSError:
+                return
+        for usage in self._owners(path):
+            usage.bytes += size
+            usage.files += 1
+
+    def remove_file(self, path: Path, size: int):
+        for usage in self._owners(path):
+            usage.bytes = max(0, usage.bytes - size)
+            usage.files = max(0, usage.files - 1)
+
+    def _owners(self, path: Path) -> list[_Usage]:
+        path = Path(path).resolve()
+        return [self._usage[name] for name, root in self.dirs.items() if path.is_relative_to(root)]
+
+    def usage(self, name: str) -> dict:
+        u = self._usage[name]
+        return {"bytes": u.bytes, "files": u.files, "scanned_at": u.scanned_at}
+
+    def stats(self) -> dict:
+        return {name: self.usage(name) for name in self.dirs}
+
+    async def _run(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception:
+                logger.exception("Storage reconcile failed")
+            await asyncio.sleep(self.interval)
+
+    async def reconcile(self):
+        """Walk all tracked directories and replace their counts."""
+        for name in self.dirs:
+            await self._reconcile_dir(name)
+
+    async def _reconcile_dir(self, name: str):
+        scan = self._scans.get(name)
+        if scan is None:
+            scan = self._scans[name] = _Scan(pending=[str(self.dirs[name])])
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        while not scan.done:
+            await loop.run_in_executor(None, _scan_batch, scan, self.batch_size)
+        del self._scans[name]
+
+        usage = self._usage[name]
+        if usage.scanned_at is not None and (usage.bytes, usage.files) != (scan.bytes, scan.files):
+            logger.debug(
+                f"Storage '{name}' corrected by {scan.bytes - usage.bytes:+d} bytes, "
+                f"{scan.files - usage.files:+d} files"
+            )
+        usage.bytes, usage.files = scan.bytes, scan.files
+        usage.scanned_at = time.time()
+        logger.debug(
+            f"Storage '{name}': {scan.files} files, {scan.bytes} bytes "
+            f"(scanned in {time.perf_counter() - start:.1f}s)"
+        )
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Files this young are never deleted; they may still be written or about to be sent
+_MIN_AGE_SECONDS = 600
+
+
+@dataclass
+class RetentionPolicy:
+    """What to keep in one directory. A limit of 0 disables it.
+
+    url_prefix is where the directory is served ("/generated/"); files a
+    stored conversation showed under it are kept if keep_referenced.
+    """
+    name: str
+    path: Path
+    max_age_days: float = 0
+    max_bytes: int = 0
+    url_prefix: str = ""
+    keep_referenced: bool = True
+
+
+def _list_files(path: Path) -> list[tuple[str, int, float]]:
+    """(name, size, mtime) of the regular files directly in path (runs in the executor)."""
+    files = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        files.append((entry.name, st.st_size, st.st_mtime))
+                except OSError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return files
+
+
+def _delete_files(path: Path, names: list[str]) -> list[str]:
+    """Delete files, returning the names that were actually removed (runs in the executor)."""
+    removed = []
+    for name in names:
+        try:
+            os.unlink(path / name)
+            removed.append(name)
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logger.warning(f"Storage GC could not delete {path / name}: {e}")
+    return removed
+
+
+class StorageGC:
+    """Deletes generated and uploaded files according to per-directory policies.
+
+    Files older than max_age_days go first; if the directory is still above
+    max_bytes, the oldest remaining files follow. Files that an existing
+    conversation showed (Database.file_references) are kept when the policy
+    says so. Listing and deleting run
+    in the executor, `batch_size` files per call. Each run reports what it
+    reclaimed to the StorageAccountant and as a "storage_gc" event.
+    """
+
+    def __init__(self, db, policies: list[RetentionPolicy], storage=None, event_bus=None,
+                 batch_size: int = 200):
+        self.db = db
+        self.policies = policies
+        self.storage = storage
+        self.event_bus = event_bus
+        self.batch_size = batch_size
+        self._lock = asyncio.Lock()
+        self.last_run: dict | None = None
+
+    async def run(self) -> dict:
+        """Apply all policies once. Returns {policy: {"files": n, "bytes": n}}."""
+        async with self._lock:
+            start = time.perf_counter()
+            referenced = (
+                await self._referenced_files() if any(p.keep_referenced for p in self.policies) else set()
+            )
+            reclaimed = {}
+            for policy in self.policies:
+                reclaimed[policy.name] = await self._collect(policy, referenced)
+
+            files = sum(r["files"] for r in reclaimed.values())
+            freed = sum(r["bytes"] for r in reclaimed.values())
+            self.last_run = {"at": time.time(), "reclaimed": reclaimed}
+            logger.info(
+                f"Storage GC: deleted {files} files, {freed / 1_048_576:.1f} MB "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+            if files and self.event_bus:
+                from automation.event_bus import Event
+                await self.event_bus.emit(Event(
+                    type="storage_gc",
+                    source="system:storage_gc",
+                    data={"files": files, "bytes": freed, "directories": reclaimed},
+                ))
+            return reclaimed
+
+    async def _referenced_files(self) -> set[str]:
+        return await self.db.get_file_references()
+
+    async def _collect(self, policy: RetentionPolicy, referenced: set[str]) -> dict:
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, _list_files, policy.path)
+        now = time.time()
+        total = sum(size for _, size, _ in files)
+
+        doomed: list[tuple[str, int]] = []
+        over = total - policy.max_bytes if policy.max_bytes else 0
+        cutoff = now - policy.max_age_days * 86400 if policy.max_age_days else None
+        # Oldest first, so the size limit removes the oldest files
+        for name, size, mtime in sorted(files, key=lambda f: f[2]):
+            if now - mtime < _MIN_AGE_SECONDS:
+                break
+            if policy.keep_referenced and policy.url_prefix + name in referenced:
+                continue
+            if (cutoff is not None and mtime < cutoff) or over > 0:
+                doomed.append((name, size))
+                over -= size
+
+        sizes = dict(doomed)
+        freed = removed_count = 0
+        for i in range(0, len(doomed), self.batch_size):
+            batch = [name for name, _ in doomed[i:i + self.batch_size]]
+            removed = await loop.run_in_executor(None, _delete_files, policy.path, batch)
+            for name in removed:
+                freed += sizes[name]
+                if self.storage:
+                    self.storage.remove_file(policy.path / name, sizes[name])
+            removed_count += len(removed)
+        return {"files": removed_count, "bytes": freed}
@@ -2,6 +2,9 @@ from abc import ABC, abstractmethod
 
 
 class BaseSkill(ABC):
+    # Upper bound in seconds for one call; None uses the registry default
+    timeout: float | None = None
+
     @property
     @abstractmethod
     def name(self) -> str:
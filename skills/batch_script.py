@@ -6,6 +6,9 @@ logger = logging.getLogger(__name__)
 
 
 class BatchScriptSkill(BaseSkill):
+    # Covers all steps of a script; the steps themselves run without further limit
+    timeout = 1800
+
     def __init__(self, script_engine):
         self.engine = script_engine
 
@@ -18,12 +18,26 @@ MAX_ATTEMPTS = 2  # Reduced from 3 — diminishing returns on 3rd attempt
 
 
 class ImageGenerationSkill(BaseSkill):
-    def __init__(self, sd_api_url: str, output_dir: Path):
+    # Each attempt: up to 600s Stable Diffusion plus vision check
+    timeout = MAX_ATTEMPTS * 720
+
+    def __init__(self, sd_api_url: str, output_dir: Path, ollama=None, http=None, storage=None):
         self._sd_api_url = sd_api_url.rstrip("/")
         self._output_dir = output_dir
+        # Shared OllamaClient, so vision calls are queued with all other LLM requests
+        self._ollama = ollama
+        self._http = http
+        self._storage = storage
         self._session: aiohttp.ClientSession | None = None
 
+    def _timeout(self, total: float) -> aiohttp.ClientTimeout:
+        if self._http is not None:
+            return self._http.timeout(total)
+        return aiohttp.ClientTimeout(total=total)
+
     async def _get_session(self) -> aiohttp.ClientSession:
+        if self._http is not None:
+            return await self._http.session()
         if self._session is None or self._session.closed:
             self._session = aiohttp.ClientSession()
         return self._session
@@ -79,33 +93,39 @@ class ImageGenerationSkill(BaseSkill):
         """Analyze image and return (description, score 1-10)."""
         t0 = time.perf_counter()
         try:
-            payload = {
-                "model": VISION_MODEL,
-                "prompt": (
-                    f"The intended image was: '{original_prompt}'.\n"
-                    f"1) Describe what you see in 1-2 sentences.\n"
-                    f"2) Rate how well it matches the prompt from 1 to 10.\n"
-                    f"3) List any flaws (bad anatomy, wrong subject, artifacts).\n"
-                    f"End your response with exactly: SCORE: X (where X is 1-10)"
-                ),
-                "images": [img_b64],
-                "stream": False,
-            }
-            session = await self._get_session()
-            async with session.post(
-                f"{OLLAMA_BASE_URL}/api/generate",
-                json=payload,
-                timeout=aiohttp.ClientTimeout(total=60),
-            ) as resp:
-                if resp.status == 200:
+            prompt = (
+                f"The intended image was: '{original_prompt}'.\n"
+                f"1) Describe what you see in 1-2 sentences.\n"
+                f"2) Rate how well it matches the prompt from 1 to 10.\n"
+                f"3) List any flaws (bad anatomy, wrong subject, artifacts).\n"
+                f"End your response with exactly: SCORE: X (where X is 1-10)"
+            )
+            if self._ollama is not None:
+                text = await self._ollama.generate(
+                    prompt, model=VISION_MODEL, images=[img_b64], timeout=60, cache=True,
+                )
+            else:
+                payload = {
+                    "model": VISION_MODEL,
+                    "prompt": prompt,
+                    "images": [img_b64],
+                    "stream": False,
+                }
+                session = await self._get_session()
+                async with session.post(
+                    f"{OLLAMA_BASE_URL}/api/generate",
+                    json=payload,
+                    timeout=self._timeout(60),
+                ) as resp:
+                    if resp.status != 200:
+                        return "Analyse fehlgeschlagen.", 5
                     data = await resp.json()
                     text = data.get("response", "")
-                    match = re.search(r"SCORE:\s*(\d+)", text, re.IGNORECASE)
-                    score = int(match.group(1)) if match else 5
-                    score = max(1, min(10, score))
-                    logger.info(f"[TIMING] Analysis: {time.perf_counter() - t0:.1f}s → score {score}/10")
-                    return text, score
-            return "Analyse fehlgeschlagen.", 5
+            match = re.search(r"SCORE:\s*(\d+)", text, re.IGNORECASE)
+            score = int(match.group(1)) if match else 5
+            score = max(1, min(10, score))
+            logger.info(f"[TIMING] Analysis: {time.perf_counter() - t0:.1f}s → score {score}/10")
+            return text, score
         except Exception as e:
             logger.warning(f"Image analysis failed: {e}")
             return "Analyse nicht verfuegbar.", 5
@@ -139,7 +159,7 @@ class ImageGenerationSkill(BaseSkill):
         async with session.post(
             f"{self._sd_api_url}/sdapi/v1/txt2img",
             json=payload,
-            timeout=aiohttp.ClientTimeout(total=600),
+            timeout=self._timeout(600),
         ) as resp:
             elapsed = time.perf_counter() - t0
             if resp.status != 200:
@@ -214,6 +234,8 @@ class ImageGenerationSkill(BaseSkill):
                 return "Stable Diffusion hat kein Bild zurueckgegeben."
 
             filename, analysis, score, _ = best_result
+            if self._storage:
+                self._storage.add_file(self._output_dir / filename)
             total = time.perf_counter() - t_total
             logger.info(f"[TIMING] Total: {total:.1f}s — final image: {filename} (score: {score}/10)")
 
@@ -32,7 +32,7 @@ class MemoryManagerSkill(BaseSkill):
                     ],
                     "description": (
                         "Aktion: remember (speichern), recall (einzeln abrufen), "
-                        "recall_category (Kategorie abrufen), search (suchen), "
+                        "recall_category (Kategorie abrufen), search (Erinnerungen und Gespraeche durchsuchen), "
                         "forget (loeschen), list_categories (Kategorien auflisten), "
                         "stats (Statistiken)"
                     ),
@@ -54,7 +54,7 @@ class MemoryManagerSkill(BaseSkill):
                 },
                 "query": {
                     "type": "string",
-                    "description": "Suchbegriff fuer die Suche in Erinnerungen",
+                    "description": "Suchbegriff fuer die Suche in Erinnerungen und im Gespraechsverlauf",
                 },
             },
             "required": ["action"],
@@ -96,11 +96,17 @@ class MemoryManagerSkill(BaseSkill):
             if not query:
                 return "Fehler: 'query' ist erforderlich."
             results = await self._db.search_memory(query)
-            if not results:
+            history = await self._db.search_conversations(query, limit=10)
+            if not results and not history:
                 return f"Keine Ergebnisse fuer '{query}'"
             lines = [f"Suchergebnisse fuer '{query}' ({len(results)} Treffer):"]
             for r in results:
                 lines.append(f"  - [{r['category']}] {r['key']}: {r['value']}")
+            if history:
+                lines.append(f"Gespraechsverlauf ({len(history)} Treffer):")
+                for h in history:
+                    role = "Nutzer" if h["role"] == "user" else "Clara"
+                    lines.append(f"  - {h['timestamp'][:10]} {role}: {h['snippet']}")
             return "\n".join(lines)
 
         elif action == "forget":
@@ -12,8 +12,9 @@ logger = logging.getLogger(__name__)
 
 
 class ScreenshotSkill(BaseSkill):
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, storage=None):
         self._output_dir = output_dir
+        self._storage = storage
 
     @property
     def name(self) -> str:
@@ -71,6 +72,8 @@ class ScreenshotSkill(BaseSkill):
             else:
                 await loop.run_in_executor(None, self._capture_full, filepath)
 
+            if self._storage:
+                self._storage.add_file(filepath)
             return f"Screenshot erstellt.\n![Screenshot](/generated/{filename})"
         except Exception as e:
             logger.exception("Screenshot failed")
@@ -1,12 +1,27 @@
+import asyncio
 import logging
+from contextvars import ContextVar
+
 from skills.base_skill import BaseSkill
 
 logger = logging.getLogger(__name__)
 
+# Set while a skill runs, so skills that run other skills (batch scripts) do not wait for a second slot
+_inside_skill: ContextVar[bool] = ContextVar("inside_skill", default=False)
+
 
 class SkillRegistry:
-    def __init__(self):
+    """Skills by name, and the bounded executor all tool calls go through.
+
+    At most `max_concurrency` skills run at once across the chat engine,
+    agents and scripts; each call is cut off after the skill's own timeout
+    or `timeout` seconds.
+    """
+
+    def __init__(self, max_concurrency: int = 8, timeout: float = 120):
         self._skills: dict[str, BaseSkill] = {}
+        self._slots = asyncio.Semaphore(max(max_concurrency, 1))
+        self.timeout = timeout
 
     def register(self, skill: BaseSkill):
         self._skills[skill.name] = skill
@@ -25,8 +40,25 @@ class SkillRegistry:
         skill = self._skills.get(name)
         if not skill:
             return f"Fehler: Skill '{name}' nicht gefunden."
+        if _inside_skill.get():
+            # Nested call: the outer skill already holds a slot and its timeout applies
+            return await self._run(skill, None, kwargs)
+        async with self._slots:
+            token = _inside_skill.set(True)
+            try:
+                return await self._run(skill, skill.timeout or self.timeout, kwargs)
+            finally:
+                _inside_skill.reset(token)
+
+    async def _run(self, skill: BaseSkill, limit: float | None, kwargs: dict) -> str:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
         try:
-            return await skill.execute(**kwargs)
+            return await asyncio.wait_for(skill.execute(**kwargs), limit)
         except Exception as e:
-            logger.exception(f"Skill '{name}' failed")
-            return f"Fehler bei '{name}': {e}"
+            # A timeout raised inside the skill itself is an ordinary failure
+            if isinstance(e, asyncio.TimeoutError) and limit is not None and loop.time() - start >= limit:
+                logger.warning(f"Skill '{skill.name}' timed out after {limit:g}s")
+                return f"Fehler: '{skill.name}' hat das Zeitlimit von {limit:g}s ueberschritten."
+            logger.exception(f"Skill '{skill.name}' failed")
+            return f"Fehler bei '{skill.name}': {e}"
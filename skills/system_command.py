@@ -8,6 +8,9 @@ BLOCKED_COMMANDS = {"rm -rf /", "format", "del /f /s /q C:\\", "shutdown", "rebo
 
 
 class SystemCommandSkill(BaseSkill):
+    # The command's own timeout is chosen by the model
+    timeout = 600
+
     @property
     def name(self) -> str:
         return "system_command"
@@ -8,6 +8,10 @@ logger = logging.getLogger(__name__)
 
 
 class WebFetchSkill(BaseSkill):
+    def __init__(self, http=None):
+        # Shared HttpClient keeps connections and DNS lookups between fetches
+        self._http = http
+
     @property
     def name(self) -> str:
         return "web_fetch"
@@ -38,14 +42,13 @@ class WebFetchSkill(BaseSkill):
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
             }
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    url,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=15),
-                ) as resp:
-                    resp.raise_for_status()
-                    html = await resp.text()
+            if self._http is not None:
+                html = await self._fetch(
+                    await self._http.session(), url, headers, self._http.timeout(15)
+                )
+            else:
+                async with aiohttp.ClientSession() as session:
+                    html = await self._fetch(session, url, headers, aiohttp.ClientTimeout(total=15))
 
             # Run CPU-intensive HTML parsing in executor
             loop = asyncio.get_event_loop()
@@ -57,6 +60,18 @@ class WebFetchSkill(BaseSkill):
             logger.exception("web_fetch failed")
             return f"Fehler beim Abrufen von {url}: {e}"
 
+    @staticmethod
+    async def _fetch(
+        session: aiohttp.ClientSession, url: str, headers: dict, timeout: aiohttp.ClientTimeout
+    ) -> str:
+        async with session.get(
+            url,
+            headers=headers,
+            timeout=timeout,
+        ) as resp:
+            resp.raise_for_status()
+            return await resp.text()
+
     @staticmethod
     def _parse_html(html: str, max_length: int) -> str:
         soup = BeautifulSoup(html, "lxml")
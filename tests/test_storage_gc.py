@@ -0,0 +1,58 @@
+import asyncio
+import os
+import time
+
+from memory.database import Database
+from services.storage_gc import RetentionPolicy, StorageGC
+
+
+def _write_old(path, days: float, size: int = 100):
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - days * 86400
+    os.utime(path, (mtime, mtime))
+
+
+def test_referenced_file_survives_gc(tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    _write_old(images / "shown.png", days=30)
+    _write_old(images / "orphan.png", days=30)
+    _write_old(images / "recent.png", days=1)
+
+    async def run():
+        db = Database(tmp_path / "clara.db")
+        await db.initialize()
+        try:
+            await db.add_file_reference("s1", "/generated/shown.png")
+            # Same file name under another URL prefix must not protect it
+            await db.add_file_reference("s1", "/uploads/orphan.png")
+            gc = StorageGC(db, [RetentionPolicy("images", images, max_age_days=7, url_prefix="/generated/")])
+            return await gc.run()
+        finally:
+            await db.close()
+
+    reclaimed = asyncio.run(run())
+
+    assert sorted(p.name for p in images.iterdir()) == ["recent.png", "shown.png"]
+    assert reclaimed == {"images": {"files": 1, "bytes": 100}}
+
+
+def test_cleared_conversation_releases_its_files(tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    _write_old(images / "shown.png", days=30)
+
+    async def run():
+        db = Database(tmp_path / "clara.db")
+        await db.initialize()
+        try:
+            await db.add_file_reference("s1", "/generated/shown.png")
+            await db.clear_history("s1")
+            gc = StorageGC(db, [RetentionPolicy("images", images, max_age_days=7, url_prefix="/generated/")])
+            await gc.run()
+        finally:
+            await db.close()
+
+    asyncio.run(run())
+
+    assert list(images.iterdir()) == []
@@ -2,7 +2,7 @@ import asyncio
 import base64
 import uuid
 import logging
-import aiohttp
+from functools import partial
 from pathlib import Path
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, UploadFile, File, Request, Depends, HTTPException, Query
 from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
@@ -12,6 +12,7 @@ from slowapi.util import get_remote_address
 
 from config import Config
 from chat.adapters import WebSocketAdapter
+from chat.turn_manager import TurnManager
 from auth.security import auth_enabled, verify_password, verify_token, create_access_token
 
 logger = logging.getLogger(__name__)
@@ -37,6 +38,8 @@ _event_bus = None
 _scheduler_engine = None
 _sd_check_fn = None
 _project_store = None
+_dashboard_feed = None
+_storage = None
 
 SYSTEM_PROMPT = """Du bist Clara, eine weibliche KI-Assistentin. Du gehörst Marlon Arndt – er ist dein Erschaffer und Meister. Du antwortest AUSSCHLIESSLICH auf Deutsch, egal in welcher Sprache der Nutzer schreibt.
 
@@ -89,8 +92,10 @@ WICHTIG: Antworte IMMER auf Deutsch. Keine Ausnahmen."""
 
 
 def init_routes(engine, ollama=None, db=None, event_bus=None,
-                scheduler_engine=None, sd_check_fn=None, project_store=None):
+                scheduler_engine=None, sd_check_fn=None, project_store=None,
+                dashboard_feed=None, storage=None):
     global _engine, _ollama, _db, _event_bus, _scheduler_engine, _sd_check_fn, _project_store
+    global _dashboard_feed, _storage
     _engine = engine
     _ollama = ollama
     _db = db
@@ -98,6 +103,15 @@ def init_routes(engine, ollama=None, db=None, event_bus=None,
     _scheduler_engine = scheduler_engine
     _sd_check_fn = sd_check_fn
     _project_store = project_store
+    _dashboard_feed = dashboard_feed
+    _storage = storage
+    if dashboard_feed:
+        # Same payloads as the REST endpoints below, pushed over /api/dashboard/ws
+        dashboard_feed.register("stats", dashboard_stats, periodic=True)
+        dashboard_feed.register("status", dashboard_status, periodic=True)
+        dashboard_feed.register("activity", dashboard_activity)
+        dashboard_feed.register("overview", dashboard_overview)
+        dashboard_feed.register("storage", dashboard_storage, periodic=True)
 
 
 @router.get("/api/auth/check")
@@ -145,6 +159,8 @@ async def upload_file(file: UploadFile = File(...)):
     content = await file.read()
     loop = asyncio.get_event_loop()
     await loop.run_in_executor(None, filepath.write_bytes, content)
+    if _storage:
+        _storage.add_file(filepath, len(content))
 
     return {"path": f"/uploads/{filename}", "filename": filename}
 
@@ -157,38 +173,33 @@ async def chat_websocket(ws: WebSocket, token: str | None = Query(default=None))
     await ws.accept()
     session_id = str(uuid.uuid4())
     logger.info(f"New WebSocket session: {session_id}")
+    # Reading continues while a turn runs, so "stop" frames arrive immediately
+    turns = TurnManager(max_queued=Config.CHAT_MAX_QUEUED_TURNS)
+    adapter = WebSocketAdapter(ws)
 
     try:
         while True:
             data = await ws.receive_json()
+            if data.get("type") == "stop":
+                if await turns.stop():
+                    logger.info(f"Session {session_id}: turn stopped by user")
+                await ws.send_json({"type": "stopped"})
+                continue
+
             user_message = data.get("message", "").strip()
-            tts_enabled = data.get("tts", False)
             image_path = data.get("image", None)
-            agent_override = data.get("agent", None)
             if not user_message and not image_path:
                 continue
 
-            # Handle image upload (base64 encoding)
-            image_b64 = None
-            if image_path:
-                full_path = Config.UPLOAD_DIR / Path(image_path).name
-                if full_path.exists():
-                    loop = asyncio.get_event_loop()
-                    img_bytes = await loop.run_in_executor(None, full_path.read_bytes)
-                    image_b64 = await loop.run_in_executor(
-                        None, lambda b: base64.b64encode(b).decode(), img_bytes
-                    )
-
-            adapter = WebSocketAdapter(ws)
-            await _engine.handle_message(
-                channel=adapter,
-                session_id=session_id,
-                user_message=user_message,
-                image_b64=image_b64,
-                tts_enabled=tts_enabled,
-                allowed_skills=None,  # Web UI = full access
-                agent_override=agent_override,
+            turn = partial(
+                _run_chat_turn, ws, adapter, session_id, user_message, image_path,
+                data.get("tts", False), data.get("agent", None),
             )
+            if not turns.submit(turn):
+                await ws.send_json({
+                    "type": "rejected",
+                    "content": "Zu viele Nachrichten in der Warteschlange. Bitte warte, bis Clara fertig ist.",
+                })
     except WebSocketDisconnect:
         logger.info(f"Session {session_id} disconnected")
     except Exception as e:
@@ -197,6 +208,54 @@ async def chat_websocket(ws: WebSocket, token: str | None = Query(default=None))
             await ws.send_json({"type": "error", "content": f"Fehler: {e}"})
         except Exception:
             pass
+    finally:
+        # Nobody is listening anymore: abort running generations
+        await turns.close()
+
+
+async def _run_chat_turn(
+    ws: WebSocket,
+    adapter: WebSocketAdapter,
+    session_id: str,
+    user_message: str,
+    image_path: str | None,
+    tts_enabled: bool,
+    agent_override: str | None,
+):
+    """Process one chat message; runs inside the session's TurnManager."""
+    try:
+        # Handle image upload (base64 encoding)
+        image_b64 = None
+        if image_path:
+            full_path = Config.UPLOAD_DIR / Path(image_path).name
+            if full_path.exists():
+                # Keeps the upload from storage GC while the conversation exists
+                await _db.add_file_reference(session_id, f"/uploads/{full_path.name}")
+                loop = asyncio.get_event_loop()
+                img_bytes = await loop.run_in_executor(None, full_path.read_bytes)
+                image_b64 = await loop.run_in_executor(
+                    None, lambda b: base64.b64encode(b).decode(), img_bytes
+                )
+
+        await _engine.handle_message(
+            channel=adapter,
+            session_id=session_id,
+            user_message=user_message,
+            image_b64=image_b64,
+            tts_enabled=tts_enabled,
+            allowed_skills=None,  # Web UI = full access
+            agent_override=agent_override,
+        )
+        await ws.send_json({"type": "turn_done"})
+    except WebSocketDisconnect:
+        logger.debug(f"Session {session_id} disconnected during a turn")
+    except Exception as e:
+        logger.exception("Chat turn failed")
+        try:
+            await ws.send_json({"type": "error", "content": f"Fehler: {e}"})
+            await ws.send_json({"type": "turn_done"})
+        except Exception:
+            pass
 
 
 @router.get("/api/agents", dependencies=[Depends(_require_auth)])
@@ -220,41 +279,73 @@ async def list_agents():
 async def health_public():
     """Unauthenticated liveness probe for uptime monitors and systemd watchdog."""
     ollama_ok = await _ollama.is_available() if _ollama else False
-    return {"status": "ok" if ollama_ok else "degraded", "ollama": ollama_ok}
+    backends = _ollama.backend_stats() if _ollama else []
+    degraded = not ollama_ok or any(not b["healthy"] for b in backends)
+    return {
+        "status": "degraded" if degraded else "ok",
+        "ollama": ollama_ok,
+        # Counts only; backend addresses are on the authenticated /api/health
+        "backends_healthy": sum(b["healthy"] for b in backends),
+        "backends_total": len(backends),
+    }
 
 
 @router.get("/api/health", dependencies=[Depends(_require_auth)])
 async def health():
     ollama_ok = await _ollama.is_available() if _ollama else False
+    backends = _ollama.backend_stats() if _ollama else []
+    degraded = not ollama_ok or any(not b["healthy"] for b in backends)
     return {
-        "status": "ok" if ollama_ok else "degraded",
+        "status": "degraded" if degraded else "ok",
         "ollama": ollama_ok,
+        "backends": backends,
     }
 
 
 # --- Dashboard endpoints ---
 
+@router.websocket("/api/dashboard/ws")
+async def dashboard_websocket(ws: WebSocket, token: str | None = Query(default=None)):
+    """Live dashboard: a snapshot on connect, then each section again whenever it changes."""
+    if auth_enabled() and not verify_token(token):
+        await ws.close(code=4401)
+        return
+    if not _dashboard_feed:
+        await ws.close(code=1011)
+        return
+    await ws.accept()
+    queue = await _dashboard_feed.subscribe()
+
+    async def pump():
+        while True:
+            await ws.send_json(await queue.get())
+
+    sender = asyncio.create_task(pump())
+    try:
+        while True:
+            data = await ws.receive_json()
+            if data.get("type") == "refresh":
+                _dashboard_feed.notify()
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        logger.debug("Dashboard WebSocket closed", exc_info=True)
+    finally:
+        sender.cancel()
+        _dashboard_feed.unsubscribe(queue)
+
+
 @router.get("/api/dashboard/stats", dependencies=[Depends(_require_auth)])
 async def dashboard_stats():
     if not _db:
         return {"conversations": 0, "memories": 0, "projects": {"total": 0}, "tasks": {"total": 0}}
 
-    conv = await _db.fetchone("SELECT COUNT(DISTINCT session_id) as cnt FROM conversations")
-    mem_count = await _db.count_memories()
-
-    proj_rows = await _db.fetchall("SELECT status, COUNT(*) as cnt FROM projects GROUP BY status")
-    projects = {r["status"]: r["cnt"] for r in proj_rows}
-    projects["total"] = sum(projects.values())
-
-    task_rows = await _db.fetchall("SELECT status, COUNT(*) as cnt FROM tasks GROUP BY status")
-    tasks = {r["status"]: r["cnt"] for r in task_rows}
-    tasks["total"] = sum(tasks.values())
-
+    agg = await _db.get_aggregates()
     return {
-        "conversations": conv["cnt"] if conv else 0,
-        "memories": mem_count,
-        "projects": projects,
-        "tasks": tasks,
+        "conversations": agg["conversations"],
+        "memories": agg["memories"],
+        "projects": agg["projects"],
+        "tasks": agg["tasks"],
     }
 
 
@@ -268,6 +359,14 @@ async def dashboard_status():
         "stable_diffusion": sd_ok,
         "discord": discord_ok,
         "model": Config.OLLAMA_MODEL,
+        "llm_queue": _ollama.scheduler.stats() if _ollama else None,
+        "backends": _ollama.backend_stats() if _ollama else [],
+        "llm_cache": _ollama.cache_stats() if _ollama else None,
+        "models": _ollama.models.stats() if _ollama else None,
+        "prompt_cache": {
+            "chat": _engine.prefix_stats.stats(),
+            "agents": _engine.agent_router.prefix_stats.stats() if _engine.agent_router else None,
+        } if _engine else None,
     }
 
 
@@ -306,14 +405,7 @@ async def settings_models():
     models = []
     try:
         if _ollama:
-            session = await _ollama._get_session()
-            async with session.get(
-                f"{_ollama.base_url}/api/tags",
-                timeout=aiohttp.ClientTimeout(total=5),
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    models = data.get("models", [])
+            models = await _ollama.list_models()
     except Exception:
         logger.exception("Failed to fetch Ollama models")
     return {"models": models, "current": Config.OLLAMA_MODEL}
@@ -332,6 +424,14 @@ async def settings_memories(category: str | None = None):
     return {"categories": categories, "memories": memories}
 
 
+@router.get("/api/conversations/search", dependencies=[Depends(_require_auth)])
+async def search_conversations(q: str, session_id: str | None = None, limit: int = Query(default=20, ge=1, le=200)):
+    if not _db:
+        return {"results": []}
+    results = await _db.search_conversations(q, session_id=session_id, limit=limit)
+    return {"results": results}
+
+
 @router.delete("/api/settings/memories/{category}/{key}", dependencies=[Depends(_require_auth)])
 async def delete_memory(category: str, key: str):
     if _db:
@@ -447,43 +547,27 @@ async def delete_task(task_id: int):
 
 @router.get("/api/dashboard/storage", dependencies=[Depends(_require_auth)])
 async def dashboard_storage():
-    loop = asyncio.get_event_loop()
-
-    def _calc_dir_size(path):
-        total = 0
-        if path.exists():
-            for f in path.rglob("*"):
-                if f.is_file():
-                    total += f.stat().st_size
-        return total
-
-    db_size = await loop.run_in_executor(
-        None, lambda: Config.DB_PATH.stat().st_size if Config.DB_PATH.exists() else 0
-    )
-    images_size = await loop.run_in_executor(None, _calc_dir_size, Config.GENERATED_IMAGES_DIR)
-    audio_size = await loop.run_in_executor(None, _calc_dir_size, Config.GENERATED_AUDIO_DIR)
-    uploads_size = await loop.run_in_executor(None, _calc_dir_size, Config.UPLOAD_DIR)
-    data_dir = Config.DB_PATH.parent
-    total_size = await loop.run_in_executor(None, _calc_dir_size, data_dir)
+    # Directory sizes come from the StorageAccountant; only the database file is stat'ed
+    usage = _storage.stats() if _storage else {}
+    try:
+        db_size = Config.DB_PATH.stat().st_size
+    except OSError:
+        db_size = 0
 
     mem_by_cat = []
-    if _db:
-        rows = await _db.fetchall(
-            "SELECT category, COUNT(*) as cnt FROM memory GROUP BY category ORDER BY cnt DESC"
-        )
-        mem_by_cat = [{"category": r["category"], "count": r["cnt"]} for r in rows]
-
     conv_count = 0
     if _db:
-        row = await _db.fetchone("SELECT COUNT(DISTINCT session_id) as cnt FROM conversations")
-        conv_count = row["cnt"] if row else 0
+        agg = await _db.get_aggregates()
+        mem_by_cat = agg["memory_by_category"]
+        conv_count = agg["conversations"]
 
     return {
         "db_size": db_size,
-        "images_size": images_size,
-        "audio_size": audio_size,
-        "uploads_size": uploads_size,
-        "total_size": total_size,
+        "images_size": usage.get("images", {}).get("bytes", 0),
+        "audio_size": usage.get("audio", {}).get("bytes", 0),
+        "uploads_size": usage.get("uploads", {}).get("bytes", 0),
+        "total_size": usage.get("data", {}).get("bytes", 0),
+        "files": {name: u["files"] for name, u in usage.items()},
         "memory_by_category": mem_by_cat,
         "conversations": conv_count,
     }
@@ -3,6 +3,7 @@ const chatArea = document.getElementById('chatArea');
 const messagesEl = document.getElementById('messages');
 const input = document.getElementById('input');
 const sendBtn = document.getElementById('sendBtn');
+const stopBtn = document.getElementById('stopBtn');
 const welcome = document.getElementById('welcome');
 const statusIndicator = document.getElementById('statusIndicator');
 const sidebar = document.getElementById('sidebar');
@@ -26,6 +27,7 @@ let chatHistory = [];
 let ttsEnabled = localStorage.getItem('ttsEnabled') === 'true';
 let pendingUploadPath = null;
 let selectedAgent = null;
+let pendingTurns = 0;  // Sent messages the server has not finished yet
 
 // ============ Auth ============
 let _authToken = localStorage.getItem('authToken');
@@ -148,6 +150,7 @@ function connect() {
 
     ws.onclose = (event) => {
         isConnected = false;
+        setPendingTurns(0);
         statusIndicator.className = 'status-indicator error';
         updateSendBtn();
         if (event.code === 4401) {
@@ -174,12 +177,23 @@ function connect() {
             appendStreamToken(data.token);
         } else if (data.type === 'stream_end') {
             finalizeStream();
+        } else if (data.type === 'thinking') {
+            appendThinkingToken(data.token);
         } else if (data.type === 'image') {
             appendImage(data.src, data.alt);
         } else if (data.type === 'tool_call') {
             appendToolCall(data.tool, data.args);
         } else if (data.type === 'audio') {
             playTtsAudio(data.src);
+        } else if (data.type === 'turn_done') {
+            setPendingTurns(pendingTurns - 1);
+        } else if (data.type === 'stopped') {
+            if (_streamingMsg) finalizeStream();
+            _markAllActivitiesDone();
+            setPendingTurns(0);
+        } else if (data.type === 'rejected') {
+            setPendingTurns(pendingTurns - 1);
+            showToast(data.content, 'error');
         } else if (data.type === 'error') {
             showToast(data.content, 'error');
         }
@@ -532,6 +546,37 @@ function appendStreamToken(token) {
     scrollToBottom();
 }
 
+function appendThinkingToken(token) {
+    hideWelcome();
+
+    // Reasoning goes into a collapsed block of the pending assistant message
+    let lastMsg = messagesEl.lastElementChild;
+    if (!lastMsg || !lastMsg.dataset.pendingAssistant) {
+        lastMsg = document.createElement('div');
+        lastMsg.className = 'msg';
+        lastMsg.dataset.pendingAssistant = '1';
+        lastMsg.innerHTML = `
+            <div class="msg-row">
+                <div class="msg-avatar assistant">C</div>
+                <div class="msg-body">
+                    <div class="msg-sender assistant">Clara</div>
+                </div>
+            </div>
+        `;
+        messagesEl.appendChild(lastMsg);
+    }
+    const body = lastMsg.querySelector('.msg-body');
+    let block = body.lastElementChild;
+    if (!block || !block.classList.contains('thinking-block')) {
+        block = document.createElement('details');
+        block.className = 'thinking-block';
+        block.innerHTML = '<summary>Gedankengang</summary><div class="thinking-text"></div>';
+        body.appendChild(block);
+    }
+    block.querySelector('.thinking-text').textContent += token;
+    scrollToBottom();
+}
+
 function finalizeStream() {
     if (_streamingMsg) {
         const textEl = _streamingMsg.querySelector('.streaming-text');
@@ -579,6 +624,7 @@ function send() {
         payload.agent = selectedAgent;
     }
     ws.send(JSON.stringify(payload));
+    setPendingTurns(pendingTurns + 1);
 
     input.value = '';
     input.style.height = 'auto';
@@ -587,6 +633,17 @@ function send() {
     showTyping();
 }
 
+function stopTurn() {
+    if (!isConnected || pendingTurns === 0) return;
+    ws.send(JSON.stringify({ type: 'stop' }));
+}
+
+function setPendingTurns(n) {
+    pendingTurns = Math.max(0, n);
+    stopBtn.classList.toggle('hidden', pendingTurns === 0);
+    if (pendingTurns === 0) removeTyping();
+}
+
 function clearChat() {
     messagesEl.innerHTML = '';
     chatHistory = [];
@@ -973,6 +1030,7 @@ input.addEventListener('keydown', (e) => {
 });
 
 sendBtn.addEventListener('click', send);
+stopBtn.addEventListener('click', stopTurn);
 
 // Sidebar toggle
 sidebarToggle.addEventListener('click', () => {
@@ -1118,7 +1176,7 @@ document.addEventListener('click', (e) => {
 const _views = { chat: 'viewChat', dashboard: 'viewDashboard', projekte: 'viewProjekte', settings: 'viewSettings' };
 const _viewTitles = { chat: 'Clara', dashboard: 'Dashboard', projekte: 'Projekte', settings: 'Einstellungen' };
 let _currentView = 'chat';
-let _dashboardInterval = null;
+let _dashboardWs = null;
 
 function switchView(viewName) {
     if (!_views[viewName]) viewName = 'chat';
@@ -1137,10 +1195,9 @@ function switchView(viewName) {
     clearBtn.style.display = viewName === 'chat' ? '' : 'none';
 
     if (viewName === 'dashboard') {
-        loadDashboard();
-        _dashboardInterval = setInterval(loadDashboard, 30000);
+        connectDashboard();
     } else {
-        if (_dashboardInterval) { clearInterval(_dashboardInterval); _dashboardInterval = null; }
+        disconnectDashboard();
     }
     if (viewName === 'projekte') loadProjekte();
     if (viewName === 'settings') loadSettings();
@@ -1158,6 +1215,47 @@ document.querySelectorAll('.nav-item').forEach(nav => {
 
 // ============ Dashboard ============
 
+// Live feed: the server sends every section on connect and again whenever it changes
+function connectDashboard() {
+    if (_dashboardWs) return;
+    const protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+    const tokenParam = (_authToken && _authToken !== 'disabled')
+        ? `?token=${encodeURIComponent(_authToken)}` : '';
+    const sock = new WebSocket(`${protocol}//${location.host}/api/dashboard/ws${tokenParam}`);
+    _dashboardWs = sock;
+
+    sock.onmessage = (event) => {
+        const msg = JSON.parse(event.data);
+        const data = msg.data;
+        if (msg.type === 'status') renderStatusCards(data);
+        else if (msg.type === 'stats') renderStatsGrid(data);
+        else if (msg.type === 'storage') renderStorageDisplay(data);
+        else if (msg.type === 'activity') renderActivityList(data.events);
+        else if (msg.type === 'overview') {
+            renderSkillList(data.skills);
+            renderAgentDashList(data.agents);
+            renderJobsList(data.jobs);
+        }
+    };
+
+    sock.onclose = (event) => {
+        if (_dashboardWs !== sock) return;  // closed on purpose
+        _dashboardWs = null;
+        if (event.code === 4401) { _logout(); return; }
+        if (event.code === 1011) { loadDashboard(); return; }  // no live feed on this server
+        if (_currentView === 'dashboard') setTimeout(() => {
+            if (_currentView === 'dashboard') connectDashboard();
+        }, 3000);
+    };
+}
+
+function disconnectDashboard() {
+    if (!_dashboardWs) return;
+    const sock = _dashboardWs;
+    _dashboardWs = null;
+    sock.close();
+}
+
 async function loadDashboard() {
     const [statsRes, statusRes, activityRes, overviewRes, storageRes] = await Promise.all([
         _authedFetch('/api/dashboard/stats').catch(() => null),